@@ -0,0 +1,63 @@
+"""Checks the battery usage, house index and costs that a District maintains while connections and cables
+change. Every district is loaded in consistency check mode, which validates this bookkeeping after every change,
+and is then configured by a few algorithms and a random series of changes. A ValueError is raised at the first
+change after which the bookkeeping no longer matches the connections and cables.
+
+Run from the repository root: python check_consistency.py
+"""
+
+import random
+
+from code import classes, algorithms
+
+DISTRICTS = (1, 2, 3)
+CHANGES = 1000
+SEED = 0
+
+
+def check_district(uid, rng):
+    """Configures a district in consistency check mode and makes random changes to it.
+
+    Parameters
+    ----------
+    uid : int
+
+    rng : random.Random
+    """
+
+    batteries_file = f"data/district_{uid}/district-{uid}_batteries.csv"
+    houses_file = f"data/district_{uid}/district-{uid}_houses.csv"
+    district = classes.District(uid, batteries_file, houses_file, consistency_check=True)
+
+    # configure the district with cables, and optimize it
+    algorithms.RandomOptimize(district).run()
+    algorithms.SimpleSwap(district).run()
+    algorithms.SimpleSwap(district, matrix=True).run()
+
+    snapshot = district.snapshot()
+
+    for i in range(CHANGES):
+        house = rng.choice(district.houses)
+        battery = district.get_house_battery(house)
+
+        if battery is None:
+            district.add_connection(rng.choice(district.batteries), house)
+        elif house.id in district.cables and rng.random() < 0.5:
+            district.remove_cable(house)
+        else:
+            district.remove_connection(battery, house)
+
+    district.restore(snapshot)
+    district.set_assignment(district.get_assignment())
+    district.reset_cables()
+    district.reset_connections()
+
+
+if __name__ == "__main__":
+
+    rng = random.Random(SEED)
+    random.seed(SEED)
+
+    for uid in DISTRICTS:
+        check_district(uid, rng)
+        print(f"district {uid}: consistent")
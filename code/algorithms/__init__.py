@@ -1,6 +1,7 @@
 """Algorithms for finding configurations and building cables in a SmartGrid district.
 
 Algorithms in this package: 
+ALNS
 ConfigFinderCosts
 ConfigFinderLength
 Upperbound
@@ -9,12 +10,18 @@ Kmeans
 KmeansSorting 
 DepthFirstCosts
 DepthFirstLength
+BeamSearch
 SharedGreedy
 RandomSharedGreedy
+SteinerTree
+SharedAnnealing
 Simple Swap
 GroupSwap 
+LocalSearch
+SimulatedAnnealing
 Randomize
-RandomOptimize 
+RandomOptimize
+RegretInsertion 
 """
 
 from .config_finder_costs import ConfigFinderCosts
@@ -25,10 +32,17 @@ from .upperbound import UpperBound
 from .kmeans import Kmeans
 from .kmeans_depth_first_costs import DepthFirstCosts
 from .kmeans_depth_first_length import DepthFirstLength
+from .kmeans_beam_search import BeamSearch
 from .kmeans_sorted import KmeansSorting
 from .randomize import Randomize
 from .sharedgreedy import SharedGreedy
 from .random_sharedgreedy import RandomSharedGreedy
 from .randomize import Randomize
 from .random_opt import RandomOptimize
-from .simple_swap import SimpleSwap
\ No newline at end of file
+from .regret_insertion import RegretInsertion
+from .simple_swap import SimpleSwap
+from .local_search import LocalSearch
+from .simulated_annealing import SimulatedAnnealing
+from .shared_annealing import SharedAnnealing
+from .alns import ALNS
+from .steiner_tree import SteinerTree
\ No newline at end of file
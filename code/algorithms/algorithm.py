@@ -3,6 +3,24 @@
 The Algorithm class has a district as attribute which can be manipulated by the algorithms. 
 """
 
+import multiprocessing
+
+
+def init_worker(algorithm):
+    """Stores the algorithm in a worker process, so it is only sent once per worker.
+    """
+
+    global worker_algorithm
+    worker_algorithm = algorithm
+
+
+def run_worker_task(name, task):
+    """Runs a method of the algorithm of a worker process for a task.
+    """
+
+    return getattr(worker_algorithm, name)(*task)
+
+
 class Algorithm():
     """Class where other algorithms can inherit the District object from. 
 
@@ -26,8 +44,11 @@ class Algorithm():
     get_path(start_location, end_location)
         Returns the pathway of a cable
 
-    prompt_iterations(iterations)
+    prompt_iterations(default, name)
         Returns number of iterations from user input
+
+    map_tasks(method, tasks, processes, chunksize)
+        Runs a method for every task, in worker processes when asked
     """
 
     def __init__(self, district):
@@ -125,16 +146,19 @@ class Algorithm():
         return path    
   
 
-    def prompt_iterations(self, default):
+    def prompt_iterations(self, default, name='iterations'):
         """ 
         Returns number of iterations from user input
 
         Parameters
         ----------
         default: int
+
+        name: str
+            What the number counts, shown in the prompt
         """  
 
-        message = f"Set iterations, for default value {default} press enter\n"
+        message = f"Set {name}, for default value {default} press enter\n"
 
         while True:
 
@@ -149,4 +173,35 @@ class Algorithm():
             if int(answer) <= 0:
                 continue
 
-            return int(answer)
\ No newline at end of file
+            return int(answer)
+
+
+    def map_tasks(self, method, tasks, processes=1, chunksize=None):
+        """Runs a method of the algorithm for every task. With more than one process, the tasks are
+        divided over worker processes that each have their own copy of the algorithm and district, so
+        the method should return its results instead of changing the district.
+
+        Parameters
+        ----------
+        method : method
+            Method of this algorithm
+
+        tasks : list
+            Tuples of arguments for the method
+
+        processes : int
+
+        chunksize : int
+            Number of tasks a worker takes at once, by default a few chunks per worker
+
+        Returns
+        ----------
+        list
+            Results of the tasks, in the order of the tasks
+        """
+
+        if processes <= 1:
+            return [method(*task) for task in tasks]
+
+        with multiprocessing.Pool(processes, initializer=init_worker, initargs=(self,)) as pool:
+            return pool.starmap(run_worker_task, [(method.__name__, task) for task in tasks], chunksize)
@@ -0,0 +1,398 @@
+"""Adaptive large neighbourhood search for districts with unique cables. Like GroupSwap, every iteration ruins part
+of the configuration by disconnecting a group of houses and recreates it by connecting them again. ALNS chooses from
+several ruin and recreate operators, and learns which ones work best for the district while it runs.
+"""
+
+import math
+import random
+
+from .algorithm import Algorithm
+
+ITERATIONS = 1000
+MIN_RUIN = 10
+MAX_RUIN = 50
+
+# scores of an operator for a new best, an improvement and an accepted configuration
+SCORES = (33, 9, 13)
+
+# iterations per segment after which the weights are updated, and how fast they react
+SEGMENT = 100
+REACTION = 0.1
+
+# record-to-record: accepted configurations cost at most this fraction more than the best
+DEVIATION = 0.01
+
+# annealing: temperature at the start and at the end of the iterations
+START_TEMPERATURE = 100
+END_TEMPERATURE = 1
+
+RUIN_OPERATORS = ('ruin_longest', 'ruin_random', 'ruin_cluster', 'ruin_worst_battery')
+RECREATE_OPERATORS = ('recreate_greedy', 'recreate_regret', 'recreate_random')
+
+class ALNS(Algorithm):
+    """Ruins and recreates the configuration of a district for #iterations, and returns the cheapest configuration
+    found. Every iteration picks a ruin and a recreate operator with a probability proportional to their weights.
+    Operators earn scores when their configuration is accepted, improves the current one, or is a new best, and
+    after every segment their weights move towards their average score. A new configuration is accepted with the
+    record-to-record rule or the annealing rule. The current and best configurations are stored as assignment
+    vectors.
+
+    Attributes
+    ----------
+    district : District object
+        An input district to perform the algorithm on
+
+    weights : dict
+        Weight of every operator {METHOD NAME: WEIGHT}
+
+    best_assignment : numpy.ndarray
+        Assignment vector of the cheapest configuration found
+
+    Methods
+    ----------
+    run()
+        Runs the algorithm
+
+    select(operators)
+        Picks an operator by roulette wheel selection
+
+    accept(costs, current_costs, progress)
+        Decides if a new configuration replaces the current one
+
+    update_weights(scores, counts)
+        Moves the weights towards the scores of the last segment
+
+    ruin_longest(size), ruin_random(size), ruin_cluster(size), ruin_worst_battery(size)
+        Disconnects a group of houses
+
+    recreate_greedy(), recreate_regret(), recreate_random()
+        Connects all free houses, returns if all houses fit
+
+    calc_regret(house)
+        Calculates the regret of a free house and its cheapest battery
+    """
+
+    def __init__(self, district, acceptance='record', regret=3, seed=None):
+        """Parameters
+        ----------
+        district : District object
+
+        acceptance : str
+            'record' for record-to-record acceptance, 'annealing' for simulated annealing
+
+        regret : int
+            Number of batteries the regret recreate operator looks ahead
+
+        seed : int
+        """
+
+        self.district = district
+        self.iterations = 0
+        self.acceptance = acceptance
+        self.regret = regret
+        self.rng = random.Random(seed)
+
+        self.weights = {name: 1 for name in RUIN_OPERATORS + RECREATE_OPERATORS}
+        self.best_assignment = None
+        self.min_costs = float('inf')
+
+
+    def run(self):
+        """Runs the ALNS algorithm
+
+        Returns
+        ----------
+        District object
+            Lowest cost district the algorithm has found
+        """
+
+        # prompt the user for iterations
+        iterations = self.prompt_iterations(default=ITERATIONS)
+
+        # start from the given configuration
+        current_assignment = self.district.get_assignment()
+        current_costs = self.district.calc_connection_costs()['total']
+        self.best_assignment = current_assignment.copy()
+        self.min_costs = current_costs
+
+        scores = {name: 0 for name in self.weights}
+        counts = {name: 0 for name in self.weights}
+
+        for i in range(iterations):
+            self.iterations += 1
+
+            ruin = self.select(RUIN_OPERATORS)
+            recreate = self.select(RECREATE_OPERATORS)
+            counts[ruin] += 1
+            counts[recreate] += 1
+
+            # ruin and recreate the current configuration
+            size = self.rng.randint(MIN_RUIN, MAX_RUIN)
+            getattr(self, ruin)(size)
+            valid = getattr(self, recreate)()
+
+            costs = self.district.calc_connection_costs()['total']
+            score = 0
+
+            if valid and costs < self.min_costs:
+                score = SCORES[0]
+                self.min_costs = costs
+                self.best_assignment = self.district.get_assignment()
+            elif valid and costs < current_costs:
+                score = SCORES[1]
+            elif valid and costs > current_costs and self.accept(costs, current_costs, i / iterations):
+                score = SCORES[2]
+
+            if score:
+                current_assignment = self.district.get_assignment()
+                current_costs = costs
+            else:
+                self.district.set_assignment(current_assignment)
+
+            scores[ruin] += score
+            scores[recreate] += score
+
+            # adapt the weights after every segment
+            if self.iterations % SEGMENT == 0:
+                self.update_weights(scores, counts)
+                scores = {name: 0 for name in self.weights}
+                counts = {name: 0 for name in self.weights}
+
+        # continue with the best found solution
+        self.district.set_assignment(self.best_assignment)
+
+        # set district cables
+        self.set_district_cables(self.district)
+
+        return self.district
+
+
+    def select(self, operators):
+        """Picks an operator with a probability proportional to its weight.
+
+        Parameters
+        ----------
+        operators : tuple
+
+        Returns
+        ----------
+        str
+        """
+
+        return self.rng.choices(operators, weights=[self.weights[name] for name in operators])[0]
+
+
+    def accept(self, costs, current_costs, progress):
+        """Decides if a configuration that is worse than the current one replaces it. With record-to-record
+        acceptance it must stay close to the best costs, with annealing it is accepted with a probability that
+        decreases with the difference and the temperature.
+
+        Parameters
+        ----------
+        costs : int
+
+        current_costs : int
+
+        progress : float
+            Fraction of the iterations that is done
+
+        Returns
+        ----------
+        bool
+        """
+
+        if self.acceptance == 'annealing':
+            temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+            return self.rng.random() < math.exp((current_costs - costs) / temperature)
+
+        return costs <= self.min_costs * (1 + DEVIATION)
+
+
+    def update_weights(self, scores, counts):
+        """Moves the weight of every used operator towards its average score in the last segment.
+
+        Parameters
+        ----------
+        scores : dict
+
+        counts : dict
+        """
+
+        for name, count in counts.items():
+            if count > 0:
+                self.weights[name] = (1 - REACTION) * self.weights[name] + REACTION * scores[name] / count
+
+            # keep every operator possible
+            self.weights[name] = max(self.weights[name], 0.1)
+
+
+    def ruin_longest(self, size):
+        """Disconnects the houses with the longest connections.
+
+        Parameters
+        ----------
+        size : int
+        """
+
+        connections = [(battery, house) for battery in self.district.batteries \
+            for house in self.district.connections[battery.id]]
+        connections.sort(key=lambda connection: self.district.distances[connection[1].id][connection[0].id], \
+            reverse=True)
+
+        for battery, house in connections[:size]:
+            self.district.remove_connection(battery, house)
+
+
+    def ruin_random(self, size):
+        """Disconnects random houses.
+
+        Parameters
+        ----------
+        size : int
+        """
+
+        connections = [(battery, house) for battery in self.district.batteries \
+            for house in self.district.connections[battery.id]]
+
+        for battery, house in self.rng.sample(connections, min(size, len(connections))):
+            self.district.remove_connection(battery, house)
+
+
+    def ruin_cluster(self, size):
+        """Disconnects a random house and the houses closest to it.
+
+        Parameters
+        ----------
+        size : int
+        """
+
+        connections = [(battery, house) for battery in self.district.batteries \
+            for house in self.district.connections[battery.id]]
+        center = self.rng.choice(connections)[1].location
+
+        connections.sort(key=lambda connection: self.calc_dist(connection[1].location, center))
+
+        for battery, house in connections[:size]:
+            self.district.remove_connection(battery, house)
+
+
+    def ruin_worst_battery(self, size):
+        """Disconnects the houses with the longest connections of the battery with the highest average
+        connection length.
+
+        Parameters
+        ----------
+        size : int
+        """
+
+        distances = self.district.distances
+        batteries = [battery for battery in self.district.batteries if self.district.connections[battery.id]]
+
+        battery = max(batteries, key=lambda battery: sum(distances[house.id][battery.id] \
+            for house in self.district.connections[battery.id]) / len(self.district.connections[battery.id]))
+
+        houses = sorted(self.district.connections[battery.id], \
+            key=lambda house: distances[house.id][battery.id], reverse=True)
+
+        for house in houses[:size]:
+            self.district.remove_connection(battery, house)
+
+
+    def recreate_greedy(self):
+        """Connects the free houses in random order to their nearest battery with capacity left, like GroupSwap.
+
+        Returns
+        ----------
+        bool
+        """
+
+        empty_houses = self.district.get_empty_houses()
+        self.rng.shuffle(empty_houses)
+
+        for house in empty_houses:
+            batteries = self.district.get_possible_batteries(house)
+
+            if not batteries:
+                return False
+
+            battery = min(batteries, key=lambda battery: self.district.distances[house.id][battery.id])
+            self.district.add_connection(battery, house)
+
+        return True
+
+
+    def recreate_regret(self):
+        """Connects the free house with the highest regret to its cheapest battery with capacity left, until
+        all houses are connected. Houses with a higher output go first on equal regret.
+
+        Returns
+        ----------
+        bool
+        """
+
+        empty_houses = self.district.get_empty_houses()
+
+        while empty_houses:
+            regrets = [self.calc_regret(house) for house in empty_houses]
+            index = max(range(len(empty_houses)), key=lambda index: (regrets[index][0], empty_houses[index].output))
+
+            regret, battery = regrets[index]
+            if battery is None:
+                return False
+
+            self.district.add_connection(battery, empty_houses.pop(index))
+
+        return True
+
+
+    def recreate_random(self):
+        """Connects the free houses in random order to a random battery with capacity left.
+
+        Returns
+        ----------
+        bool
+        """
+
+        empty_houses = self.district.get_empty_houses()
+        self.rng.shuffle(empty_houses)
+
+        for house in empty_houses:
+            batteries = self.district.get_possible_batteries(house)
+
+            if not batteries:
+                return False
+
+            self.district.add_connection(self.rng.choice(batteries), house)
+
+        return True
+
+
+    def calc_regret(self, house):
+        """Calculates the regret of a free house: how much more its next cheapest batteries with capacity left
+        cost than its cheapest one, summed over the regret number of batteries. Missing batteries count as
+        infinitely expensive, so houses with few options go first.
+
+        Parameters
+        ----------
+        house : House object
+
+        Returns
+        ----------
+        tuple
+            Regret and cheapest battery, or None as battery if no battery has capacity left
+        """
+
+        costs = self.district.costs[house.id]
+        batteries = sorted(self.district.get_possible_batteries(house), key=lambda battery: costs[battery.id])
+
+        if not batteries:
+            return float('inf'), None
+
+        regret = 0
+        for i in range(1, self.regret):
+            if i >= len(batteries):
+                return float('inf'), batteries[0]
+
+            regret += costs[batteries[i].id] - costs[batteries[0].id]
+
+        return regret, batteries[0]
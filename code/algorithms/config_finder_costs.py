@@ -4,7 +4,6 @@ The algorithm then randomly connects the free houses to the battery and calculat
 It does this over multiple iterations and eventually returns the district with the cheapest configuration.
 """
 
-import copy
 import random
 
 from .algorithm import Algorithm
@@ -32,8 +31,8 @@ class ConfigFinderCosts(Algorithm):
     min_costs: float
         Lowest configuration cost found
     
-    best_connections: dict
-        Found configuration with the lowest cost
+    best_solution: dict
+        Snapshot of the found configuration with the lowest cost
 
     Methods
     ----------
@@ -41,6 +40,9 @@ class ConfigFinderCosts(Algorithm):
     run()
         Runs the algorithm
 
+    init_nearest_batteries()
+        Orders the batteries on cluster distance for every house
+
     nearest_free_battery(house)
         Finds battery belonging the closest cluster to a house
 
@@ -65,8 +67,9 @@ class ConfigFinderCosts(Algorithm):
         self.district = district
         self.clusters = clusters
         self.free_houses = []
+        self.centroid_dists, self.nearest_batteries = self.init_nearest_batteries()
         self.min_costs = float('inf')
-        self.best_connections = copy.copy(self.district.connections)   
+        self.best_solution = None   
 
 
     def run(self):
@@ -82,9 +85,8 @@ class ConfigFinderCosts(Algorithm):
         iterations = self.prompt_iterations(default=ITERATIONS)
 
         # save initial connections
-        init_connections = {}
-        for key, value in self.district.connections.items():
-            init_connections[key] = copy.copy(value)
+        init_solution = self.district.snapshot()
+        self.best_solution = init_solution
 
         for i in range(iterations):
             
@@ -107,22 +109,43 @@ class ConfigFinderCosts(Algorithm):
                 if costs < self.min_costs:
                     # save new minimum value
                     self.min_costs = costs
-                    self.best_connections = self.district.connections
+                    self.best_solution = self.district.snapshot()
 
             # reset the initial connections
-            connections = {}
-            for key, value in init_connections.items():
-                connections[key] = copy.copy(value)
-            
-            # set connections
-            self.district.set_connections(connections)
+            self.district.restore(init_solution)
 
         # set best connections
-        self.district.set_connections(self.best_connections)
+        self.district.restore(self.best_solution)
 
         return self.district        
 
 
+    def init_nearest_batteries(self):
+        """Calculates the distance of every house to every cluster centroid once, and orders the
+        batteries on the distance of their cluster for every house.
+
+        Returns
+        ----------
+        dict
+            Distances {HOUSE_ID: {BATTERY_ID: DISTANCE}}
+
+        dict
+            Ordered batteries {HOUSE_ID: [BATTERY, BATTERY, ...]}
+        """
+
+        centroid_dists = {}
+        nearest_batteries = {}
+
+        for house in self.district.houses:
+            centroid_dists[house.id] = {cluster['battery'].id: self.calc_dist(cluster['centroid'], \
+                house.location) for cluster in self.clusters}
+
+            clusters = sorted(self.clusters, key=lambda cluster: centroid_dists[house.id][cluster['battery'].id])
+            nearest_batteries[house.id] = [cluster['battery'] for cluster in clusters]
+
+        return centroid_dists, nearest_batteries
+
+
     def nearest_free_battery(self, house):
         """
         Calculates which battery belongs to the cluster nearest to the given house
@@ -136,14 +159,11 @@ class ConfigFinderCosts(Algorithm):
         Battery object
         """
 
-        # sort clusters on distance from house
-        self.clusters.sort(key=lambda cluster: self.calc_dist(cluster['centroid'], house.location))
-
-        # chooses first free battery
-        for cluster in self.clusters:
+        # chooses first free battery, ordered on cluster distance from house
+        for battery in self.nearest_batteries[house.id]:
 
-            if not self.district.calc_overload(cluster['battery'], house):
-                return cluster['battery']
+            if not self.district.calc_overload(battery, house):
+                return battery
 
         return None
 
@@ -163,7 +183,8 @@ class ConfigFinderCosts(Algorithm):
             while self.district.get_usage(battery) > (battery.capacity - CAPACITY_OFFSET):
 
                 # remove house
-                removed_house = self.district.connections[battery.id].pop(0)
+                removed_house = self.district.connections[battery.id][0]
+                self.district.remove_connection(battery, removed_house)
 
                 # add removed hosue to free houses
                 self.free_houses.append(removed_house)
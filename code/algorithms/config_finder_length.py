@@ -4,7 +4,6 @@ The algorithm then randomly connects the free houses to the battery and calculat
 It does this over multiple iterations and eventually returns the district with the shortest longest connection.
 """
 
-import copy
 import random
 
 from .algorithm import Algorithm
@@ -32,8 +31,8 @@ class ConfigFinderLength(Algorithm):
     min_longest_connection_dist: float
         Shortest longest connection found
     
-    best_connections: dict
-        Found configuration with Shortest longest connection
+    best_solution: dict
+        Snapshot of the found configuration with Shortest longest connection
 
     Methods
     ----------
@@ -41,6 +40,9 @@ class ConfigFinderLength(Algorithm):
     run()
         Runs the algorithm
 
+    init_nearest_batteries()
+        Orders the batteries on cluster distance for every house
+
     nearest_free_battery(house)
         Finds battery belonging the closest cluster to a house
 
@@ -68,8 +70,9 @@ class ConfigFinderLength(Algorithm):
         self.district = district
         self.clusters = clusters
         self.free_houses = []
+        self.centroid_dists, self.nearest_batteries = self.init_nearest_batteries()
         self.min_longest_connection_dist = float('inf')
-        self.best_connections = copy.copy(self.district.connections) 
+        self.best_solution = None 
 
 
     def run(self):
@@ -85,10 +88,8 @@ class ConfigFinderLength(Algorithm):
         iterations = self.prompt_iterations(default=ITERATIONS)
 
         # save initial connections
-        init_connections = {}
-        for key, value in self.district.connections.items():
-            init_connections[key] = copy.copy(value)
-
+        init_solution = self.district.snapshot()
+        self.best_solution = init_solution
 
         for i in range(iterations):
 
@@ -113,21 +114,43 @@ class ConfigFinderLength(Algorithm):
                     
                   #  save new minimum value
                     self.min_longest_connection_dist = longest_connection_dist
-                    self.best_connections = self.district.connections  
+                    self.best_solution = self.district.snapshot()  
             
             # reset the initial connections
-            connections = {}
-            for key, value in init_connections.items():
-                connections[key] = copy.copy(value)
-
-            self.district.set_connections(connections)
+            self.district.restore(init_solution)
 
         # set best connections
-        self.district.set_connections(self.best_connections)
+        self.district.restore(self.best_solution)
 
         return self.district        
 
 
+    def init_nearest_batteries(self):
+        """Calculates the distance of every house to every cluster centroid once, and orders the
+        batteries on the distance of their cluster for every house.
+
+        Returns
+        ----------
+        dict
+            Distances {HOUSE_ID: {BATTERY_ID: DISTANCE}}
+
+        dict
+            Ordered batteries {HOUSE_ID: [BATTERY, BATTERY, ...]}
+        """
+
+        centroid_dists = {}
+        nearest_batteries = {}
+
+        for house in self.district.houses:
+            centroid_dists[house.id] = {cluster['battery'].id: self.calc_dist(cluster['centroid'], \
+                house.location) for cluster in self.clusters}
+
+            clusters = sorted(self.clusters, key=lambda cluster: centroid_dists[house.id][cluster['battery'].id])
+            nearest_batteries[house.id] = [cluster['battery'] for cluster in clusters]
+
+        return centroid_dists, nearest_batteries
+
+
     def nearest_free_battery(self, house):
         """
         Calculates which battery belongs to the cluster nearest to the given house
@@ -141,14 +164,11 @@ class ConfigFinderLength(Algorithm):
         Battery object
         """
 
-        # sort clusters on distance from house
-        self.clusters.sort(key=lambda cluster: self.calc_dist(cluster['centroid'], house.location))
-
-        # chooses first free battery
-        for cluster in self.clusters:
+        # chooses first free battery, ordered on cluster distance from house
+        for battery in self.nearest_batteries[house.id]:
 
-            if not self.district.calc_overload(cluster['battery'], house):
-                return cluster['battery']
+            if not self.district.calc_overload(battery, house):
+                return battery
 
         return None
 
@@ -168,7 +188,8 @@ class ConfigFinderLength(Algorithm):
             while self.district.get_usage(battery) > (battery.capacity - CAPACITY_OFFSET):
 
                 # remove house
-                removed_house = self.district.connections[battery.id].pop(0)
+                removed_house = self.district.connections[battery.id][0]
+                self.district.remove_connection(battery, removed_house)
 
                 # add removed hosue to free houses
                 self.free_houses.append(removed_house)
@@ -209,11 +230,12 @@ class ConfigFinderLength(Algorithm):
 
         # loop through clusters
         for cluster in self.clusters:
+            battery_id = cluster['battery'].id
 
             # loop through houses in cluster
-            for house in connections[cluster['battery'].id]:
+            for house in connections[battery_id]:
 
-                dist = self.calc_dist(house.location, cluster['centroid'])
+                dist = self.centroid_dists[house.id][battery_id]
 
                 # save maximum distance
                 if dist > max_dist:
@@ -0,0 +1,504 @@
+"""Search core for the depth first algorithms. Instead of storing a copy of all connections for every state on the
+stack, the search walks the tree with the connections of the district itself. A state on the stack is only the
+depth of a free house and the battery to connect it to, and an undo log of the connected houses brings the district
+back to the parent of the next state.
+Houses with the same output can be swapped between batteries without changing the room left in any battery. A
+transposition table remembers the states that were searched, so a state that can not do better than an equivalent
+state is skipped.
+With more than one process, the tree is split at a shallow depth into subtrees that worker processes search, while
+they share the best value found so far to cut their states. A time limit stops the search with the best solution
+found so far.
+"""
+
+import multiprocessing
+import time
+from abc import ABC, abstractmethod
+
+from .algorithm import Algorithm
+
+# maximum number of states in the transposition table, after which it is cleared
+TABLE_SIZE = 1000000
+
+# decimals of the battery usage in the keys of the transposition table, to ignore rounding errors
+DECIMALS = 6
+
+# subtrees per process the tree is at least split into, so idle workers can take over the remaining ones
+TASKS_PER_PROCESS = 8
+
+# states between exchanges of the best value with the other workers
+SYNC_INTERVAL = 1000
+
+# states between checks of the time limit
+TIME_INTERVAL = 1000
+
+class DepthFirstSearch(Algorithm, ABC):
+    """Depth first search over the batteries of a fixed list of free houses. The house at a depth is connected to
+    the battery of a state when the state is popped from the stack, after the houses deeper than the state are
+    disconnected again. The stack and the undo log hold at most a few states per depth, and every state costs one
+    connection and on average one disconnection. Inheriting algorithms choose the children of a state, cut states
+    and check solutions, and must implement the abstract methods.
+
+    The transposition table is keyed by the depth and the usage of every battery. The houses below a state are the
+    same for every state with the same depth, so states with the same key have the same subtree. The table stores
+    the lowest value of the searched states of a key, for instance their costs, and a state is skipped when its value
+    is not lower. Without houses with the same output, states with the same usage do not occur, so then the table
+    is not used. Houses with the same output and location are interchangeable, so they are searched after each
+    other and connected to batteries in order of battery ID, which skips their permutations.
+
+    In parallel mode the tree is searched up to the smallest depth that has TASKS_PER_PROCESS states for every
+    process. The states at that depth are subtrees that are searched by a pool of worker processes, one subtree at a
+    time, so a worker that is done takes the next subtree. The best value is shared between the workers in shared
+    memory: a worker publishes a better value and adopts a better value of another worker, so every worker cuts
+    against the best value of all of them. The best solution of all subtrees is the same as that of the serial
+    search.
+
+    With a time limit every process stops searching when the time is up, and the best solution found so far is
+    kept. The search is then marked as timed out, since a better solution may have been skipped.
+
+    Attributes
+    ----------
+    houses : list
+        Free houses to search for, in order of depth
+
+    log : list
+        Battery of every connected house, in order of depth
+
+    table : dict
+        Lowest value of the searched states {(DEPTH, USAGE): VALUE}
+
+    twins : list
+        If the house at every depth is interchangeable with the house before it
+
+    best_solution : numpy.ndarray
+        Assignment vector of the best solution
+
+    timed_out : bool
+        If the time limit stopped the search before all states were searched
+
+    Methods
+    ----------
+    search(houses)
+        Searches all configurations of the free houses
+
+    prepare()
+        Prepares the inheriting algorithm for a search of the houses
+
+    walk(start, split_depth)
+        Searches the states below the current state
+
+    split()
+        Returns the paths to the subtrees for the worker processes
+
+    search_subtree(path)
+        Searches the subtree below a path of batteries in a worker process
+
+    sync_best()
+        Exchanges the best value with the other worker processes
+
+    connect(depth, battery)
+        Connects the house at a depth to a battery
+
+    undo(depth)
+        Disconnects the houses at and below a depth
+
+    build_children(depth)
+        Returns the batteries for the house at a depth, the first searched first
+
+    is_cut(depth)
+        Returns if the states below the current state can be skipped
+
+    is_transposition(depth)
+        Returns if a searched state with the same depth and usage is at least as good
+
+    get_state_value()
+        Returns the value of the current state for the transposition table
+
+    group_twins(houses)
+        Orders interchangeable houses after each other
+
+    check_solution()
+        Checks and accepts better solutions than the current solution
+
+    get_best_value(), set_best_value(value)
+        Returns or replaces the value of the best solution
+    """
+
+    def __init__(self, district, processes=1, verbose=True, time_limit=None):
+        """Parameters
+        ----------
+        district : District object
+
+        processes : int
+            Number of worker processes, 1 searches in this process
+
+        verbose : bool
+            Print every better solution
+
+        time_limit : float
+            Seconds after which the search stops, None to search all states
+        """
+
+        self.district = district
+        self.iterations = 0
+        self.processes = processes
+        self.verbose = verbose
+        self.time_limit = time_limit
+        self.deadline = None
+        self.timed_out = False
+        self.shared_best = None
+        self.found = None
+        self.houses = []
+        self.log = []
+        self.best_solution = None
+        self.table = {}
+        self.twins = []
+        self.use_table = False
+        self.transpositions = 0
+
+
+    def search(self, houses):
+        """Searches all configurations of the free houses, starting with all of them free.
+
+        Parameters
+        ----------
+        houses : list
+            Free houses, in the order in which they are connected
+        """
+
+        self.houses = self.group_twins(houses)
+        self.log = []
+        self.table = {}
+        self.timed_out = False
+
+        # the workers compare against the same wall clock
+        if self.time_limit is not None:
+            self.deadline = time.time() + self.time_limit
+
+        # only houses with the same output lead to the same usage in another way
+        outputs = [round(house.output, DECIMALS) for house in self.houses]
+        self.use_table = len(set(outputs)) < len(outputs)
+
+        self.prepare()
+
+        if self.processes <= 1:
+            self.walk(0)
+            self.undo(0)
+            return
+
+        paths = self.split()
+
+        # share the best value with the worker processes
+        self.shared_best = multiprocessing.Value('d', self.get_best_value())
+        self.table = {}
+
+        results = self.map_tasks(self.search_subtree, [(path,) for path in paths], self.processes, chunksize=1)
+        self.shared_best = None
+
+        for iterations, value, solution, timed_out in results:
+            self.iterations += iterations
+            self.timed_out = self.timed_out or timed_out
+
+            if solution is not None and value <= self.get_best_value():
+                self.set_best_value(value)
+                self.best_solution = solution
+
+
+    def walk(self, start, split_depth=None):
+        """Searches the states below the current state, which has a number of connected houses. States at the
+        split depth are not searched, but their paths of batteries are returned.
+
+        Parameters
+        ----------
+        start : int
+            Number of connected houses of the current state
+
+        split_depth : int
+
+        Returns
+        ----------
+        list
+            Battery IDs of the connected houses of every state at the split depth
+        """
+
+        paths = []
+
+        # a state is the number of connected houses and the battery of the last one
+        states = [(start, None)]
+
+        while states:
+            depth, battery = states.pop()
+            self.iterations += 1
+
+            # return to the parent of the state and connect its house
+            if battery is not None:
+                self.undo(depth - 1)
+                self.connect(depth - 1, battery)
+
+            if self.shared_best is not None and self.iterations % SYNC_INTERVAL == 0:
+                self.sync_best()
+
+            if self.deadline is not None and self.iterations % TIME_INTERVAL == 0 and time.time() > self.deadline:
+                self.timed_out = True
+                break
+
+            if self.is_transposition(depth) or self.is_cut(depth):
+                continue
+
+            if depth == split_depth:
+                paths.append([battery.id for battery in self.log])
+                continue
+
+            if depth == len(self.houses):
+                solution = self.best_solution
+                self.check_solution()
+
+                # remember the value of a solution this process found
+                if self.best_solution is not solution:
+                    self.found = self.get_best_value()
+                continue
+
+            children = self.build_children(depth)
+
+            # interchangeable houses are connected in order of battery ID
+            if self.twins[depth]:
+                children = [battery for battery in children if battery.id >= self.log[-1].id]
+
+            for battery in reversed(children):
+                states.append((depth + 1, battery))
+
+        return paths
+
+
+    def split(self):
+        """Searches the tree up to the smallest depth with TASKS_PER_PROCESS states for every process, and returns
+        the paths of batteries to the states at that depth.
+
+        Returns
+        ----------
+        list
+        """
+
+        for split_depth in range(1, len(self.houses) + 1):
+            self.table = {}
+            paths = self.walk(0, split_depth)
+            self.undo(0)
+
+            if len(paths) >= TASKS_PER_PROCESS * self.processes or self.timed_out:
+                break
+
+        return paths
+
+
+    def search_subtree(self, path):
+        """Searches the subtree below a path of batteries in a worker process.
+
+        Parameters
+        ----------
+        path : list
+            Battery IDs of the first houses
+
+        Returns
+        ----------
+        int
+            Number of states searched
+
+        float
+            Value of the best solution found in the subtree
+
+        numpy.ndarray
+            Best solution found in the subtree, None if no better solution than that of the other workers was found
+
+        bool
+            If the time limit stopped the search of the subtree
+        """
+
+        self.iterations = 0
+        self.found = None
+        self.timed_out = False
+        self.sync_best()
+
+        for depth, battery_id in enumerate(path):
+            self.connect(depth, self.district.batteries[battery_id])
+
+        self.walk(len(path))
+        self.undo(0)
+
+        if self.found is None:
+            return self.iterations, None, None, self.timed_out
+
+        self.sync_best()
+
+        return self.iterations, self.found, self.best_solution, self.timed_out
+
+
+    def sync_best(self):
+        """Publishes the best value of this process when it is better than that of the other processes, or
+        adopts theirs to cut against.
+        """
+
+        value = self.get_best_value()
+
+        with self.shared_best.get_lock():
+            if value < self.shared_best.value:
+                self.shared_best.value = value
+            elif self.shared_best.value < value:
+                self.set_best_value(self.shared_best.value)
+
+
+    def prepare(self):
+        """Prepares the inheriting algorithm for a search of the houses, before any house is connected. Nothing
+        is prepared by default.
+        """
+
+
+    def connect(self, depth, battery):
+        """Connects the house at a depth to a battery and logs it.
+
+        Parameters
+        ----------
+        depth : int
+
+        battery : Battery object
+        """
+
+        self.district.add_connection(battery, self.houses[depth])
+        self.log.append(battery)
+
+
+    def undo(self, depth):
+        """Disconnects the houses at and below a depth, the deepest first.
+
+        Parameters
+        ----------
+        depth : int
+        """
+
+        while len(self.log) > max(depth, 0):
+            battery = self.log.pop()
+            self.district.remove_connection(battery, self.houses[len(self.log)])
+
+
+    @abstractmethod
+    def build_children(self, depth):
+        """Returns the batteries to connect the house at a depth to, the first searched first.
+
+        Parameters
+        ----------
+        depth : int
+
+        Returns
+        ----------
+        list
+        """
+
+
+    def is_cut(self, depth):
+        """Returns if the states below the current state can be skipped. Nothing is cut by default.
+
+        Parameters
+        ----------
+        depth : int
+
+        Returns
+        ----------
+        bool
+        """
+
+        return False
+
+
+    def is_transposition(self, depth):
+        """Returns if a searched state with the same depth and battery usage has a value that is not higher.
+        Otherwise the value of the state is stored in the transposition table.
+
+        Parameters
+        ----------
+        depth : int
+
+        Returns
+        ----------
+        bool
+        """
+
+        if not self.use_table:
+            return False
+
+        value = self.get_state_value()
+
+        if value is None:
+            return False
+
+        key = (depth, tuple(round(usage, DECIMALS) for usage in self.district.usage.values()))
+
+        if self.table.get(key, float('inf')) <= value:
+            self.transpositions += 1
+            return True
+
+        if len(self.table) >= TABLE_SIZE:
+            self.table = {}
+
+        self.table[key] = value
+
+        return False
+
+
+    def get_state_value(self):
+        """Returns the value of the current state for the transposition table, which may not decrease deeper in
+        the tree. None by default, which turns the table off.
+
+        Returns
+        ----------
+        float
+        """
+
+        return None
+
+
+    def group_twins(self, houses):
+        """Orders the houses with the same output and location after the first of them, and marks every house
+        that is interchangeable with the house before it.
+
+        Parameters
+        ----------
+        houses : list
+
+        Returns
+        ----------
+        list
+        """
+
+        groups = {}
+        for house in houses:
+            groups.setdefault((house.output, house.location), []).append(house)
+
+        houses = [house for group in groups.values() for house in group]
+        self.twins = [False] + [(house.output, house.location) == (previous.output, previous.location) \
+            for previous, house in zip(houses, houses[1:])]
+
+        return houses
+
+
+    @abstractmethod
+    def check_solution(self):
+        """Checks and accepts better solutions than the current solution, when all houses are connected.
+        """
+
+
+    @abstractmethod
+    def get_best_value(self):
+        """Returns the value of the best solution, which the search minimizes.
+
+        Returns
+        ----------
+        float
+        """
+
+
+    @abstractmethod
+    def set_best_value(self, value):
+        """Replaces the value of the best solution, to cut against the best value of another process.
+
+        Parameters
+        ----------
+        value : float
+        """
@@ -5,7 +5,6 @@ repeatedly takes a sample of these. If a new, random configuration of this sampl
 best solution. This goes on until after the specified amount of iterations.
 """
 
-import copy
 import random
 
 from .algorithm import Algorithm
@@ -29,8 +28,8 @@ class GroupSwap(Algorithm):
     iterations : int
         Number of iterations done by the algorithm, starts at 0
 
-    best_solution: District object
-        To store the best solution in, this updates as the algorithm goes on
+    best_solution: dict
+        Snapshot of the best solution, this updates as the algorithm goes on
 
     Methods
     ----------
@@ -59,9 +58,8 @@ class GroupSwap(Algorithm):
         self.district = district
         self.groupsizes = [50, 20] 
         self.iterations = 0
-        self.best_solution = copy.deepcopy(district)
-        self.min_costs = self.district.calc_connection_costs()['total']
-        self.solution_found = False
+        self.best_solution = None
+        self.min_costs = float('inf')
 
 
     def run(self):
@@ -76,6 +74,10 @@ class GroupSwap(Algorithm):
         # prompt the user for iterations
         iterations = self.prompt_iterations(default=ITERATIONS)
 
+        # start from the given configuration
+        self.best_solution = self.district.snapshot()
+        self.min_costs = self.district.calc_connection_costs()['total']
+
         for groupsize in self.groupsizes:
 
             for i in range(iterations):
@@ -98,13 +100,10 @@ class GroupSwap(Algorithm):
                     # check if solution is better
                     if costs < self.min_costs:  
                         self.min_costs = costs
-                        self.best_solution = copy.deepcopy(self.district)
-                        self.solution_found = True
+                        self.best_solution = self.district.snapshot()
 
             # for next group work with best found solution
-            if self.solution_found:
-                self.district = self.best_solution
-                self.solution_found = False      
+            self.district.restore(self.best_solution)
 
         # set district cables
         self.set_district_cables(self.district)
@@ -120,11 +119,9 @@ class GroupSwap(Algorithm):
         bool
         """
 
-        # random shuffle houses list
-        random.shuffle(self.district.houses)
-
-        # get empty houses
+        # get empty houses in random order
         empty_houses = self.district.get_empty_houses()
+        random.shuffle(empty_houses)
 
         # assign all free houses to nearest free battery
         for house in empty_houses:
@@ -179,7 +176,7 @@ class GroupSwap(Algorithm):
             for house in houses:
                 connection_list.append([battery, house])
 
-        return sorted(connection_list, key=lambda connection: self.calc_dist(connection[1].location, connection[0].location), reverse=True)
+        return sorted(connection_list, key=lambda connection: self.district.distances[connection[1].id][connection[0].id], reverse=True)
 
 
     def get_nearest_free_battery(self, house):
@@ -196,4 +193,4 @@ class GroupSwap(Algorithm):
         if not possible_batteries:
             return None
            
-        return min(possible_batteries, key=lambda battery: self.calc_dist(house.location, battery.location))
+        return min(possible_batteries, key=lambda battery: self.district.distances[house.id][battery.id])
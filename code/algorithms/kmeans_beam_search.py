@@ -0,0 +1,272 @@
+"""Our K-Means BeamSearch algorithm frees the same border houses as DepthFirstCosts, and searches the same states, but
+in order of their lower bound instead of depth first. States wait in a priority queue ordered by their costs plus a
+lower bound of the costs of the free houses. With a beam width only that many states are kept for every depth, and
+the number of stored states never exceeds a maximum, so the time and memory of a run are known beforehand.
+"""
+
+import heapq
+
+from .kmeans_depth_first_costs import DepthFirstCosts
+
+BEAM_WIDTH = 100
+MAX_STATES = 100000
+
+# fraction of the states that is kept when the queue is full
+KEEP = 0.75
+
+class BeamSearch(DepthFirstCosts):
+    """Best-first and beam search over the batteries of the border houses. A state is a path of battery IDs for the
+    first free houses, and the district is brought to a state by undoing the connections after the part of the path
+    it shares with the current state and connecting the rest. Every child of a state is costed by the lower bound of
+    DepthFirstCosts, and children that can not beat the best solution are dropped.
+
+    Since the batteries have little capacity to spare, most states run out of room before every house is connected,
+    and trimming the states could drop all states that lead to a solution. A greedy dive therefore finds a first
+    solution before the search, so a tight maximum gives a worse result instead of none. If the dive finds no
+    solution, the free houses do not fit and the configuration the search started from is kept. Like
+    DepthFirstCosts, the search changes the given district in place.
+
+    Without a beam width the state with the lowest bound is searched first. The bound never overestimates, so when
+    the best state in the queue can not beat the best solution, that solution is optimal. When the queue is full,
+    only the best states are kept and the result is no longer guaranteed optimal. With a beam width the search goes
+    one depth at a time and keeps the beam width best children of every depth, in a heap that drops the worst child
+    as soon as it is full. The states of a depth that are not expanded yet count towards the maximum as well.
+
+    Parameters
+    ----------
+    district : District object
+
+    beam_width : int
+
+    max_states : int
+
+    verbose : bool
+
+    Methods
+    ----------
+    run()
+        Runs the algorithm.
+
+    dive()
+        Searches depth first, cheapest battery first, until the first solution.
+
+    search_best_first()
+        Searches the state with the lowest bound first.
+
+    search_beam()
+        Searches the best states of every depth.
+
+    trim(queue)
+        Keeps the best states of a full queue.
+
+    expand(path)
+        Yields the children of a state with their bounds.
+
+    go_to(path)
+        Brings the district to a state.
+    """
+
+    def __init__(self, district, beam_width=None, max_states=MAX_STATES, verbose=True):
+        """Parameters
+        ----------
+        district : District object
+
+        beam_width : int
+            Number of states kept for every depth, None for best-first search
+
+        max_states : int
+            Maximum number of stored states
+
+        verbose : bool
+            Print every better solution
+        """
+
+        if max_states < 1:
+            raise ValueError(f"max_states must be at least 1, not {max_states}")
+
+        super().__init__(district, branch_and_bound=True, verbose=verbose)
+        self.beam_width = beam_width
+        self.max_states = max_states
+        self.dropped = 0
+
+
+    def run(self):
+        """Runs the algorithm untill no state can beat the best solution, or all depths are searched.
+
+        Returns
+        ----------
+        District object
+            The given district, with the best found configuration
+        """
+
+        start = self.district.snapshot()
+
+        # free the houses on the cluster borders
+        self.connections = self.remove_connections(self.district.connections)
+        self.houses = self.district.get_empty_houses()
+        self.log = []
+        self.prepare()
+
+        self.dive()
+
+        if self.beam_width is None:
+            self.search_best_first()
+        else:
+            self.search_beam()
+
+        self.undo(0)
+
+        # keep the start when the free houses do not fit
+        if self.best_solution is None:
+            self.district.restore(start)
+        else:
+            # update the input district with the best result found
+            self.district.set_assignment(self.best_solution)
+
+        return self.district
+
+
+    def dive(self):
+        """Searches depth first, the cheapest battery first, and stops at the first solution. States in which the
+        free houses do not fit are cut, so the dive only backtracks from those.
+        """
+
+        states = [(0, None)]
+
+        while states and self.best_solution is None:
+            depth, battery = states.pop()
+            self.iterations += 1
+
+            if battery is not None:
+                self.undo(depth - 1)
+                self.connect(depth - 1, battery)
+
+            if self.calc_lower_bound() == float('inf'):
+                continue
+
+            if depth == len(self.houses):
+                self.check_solution()
+                continue
+
+            for battery in reversed(self.build_children(depth)):
+                states.append((depth + 1, battery))
+
+        self.undo(0)
+
+
+    def search_best_first(self):
+        """Searches the state with the lowest bound first, the deepest state on equal bounds, until the best state
+        in the queue can not beat the best solution.
+        """
+
+        queue = [(self.calc_lower_bound(), 0, ())]
+
+        while queue:
+            bound, depth, path = heapq.heappop(queue)
+            self.iterations += 1
+
+            if bound >= self.best_total:
+                break
+
+            if len(path) == len(self.houses):
+                self.go_to(path)
+                self.check_solution()
+                continue
+
+            for child_bound, child in self.expand(path):
+
+                # keep the best states when the queue is full
+                if len(queue) >= self.max_states:
+                    self.trim(queue)
+
+                heapq.heappush(queue, (child_bound, -len(child), child))
+
+
+    def search_beam(self):
+        """Searches the free houses one depth at a time, and keeps the children with the lowest bounds of every
+        depth, at most the beam width. The children wait in a heap with the highest bound on top, which is
+        replaced when a better child comes in and the heap is full.
+        """
+
+        # states are stored with a negative bound, the highest bound on top of the heap
+        states = [(-self.calc_lower_bound(), ())]
+
+        for depth in range(len(self.houses)):
+            children = []
+
+            # expand the states with the lowest bound first
+            states.sort()
+            while states:
+                key, path = states.pop()
+                self.iterations += 1
+
+                for bound, child in self.expand(path):
+
+                    # the states that are not expanded yet are stored as well
+                    if len(children) < min(self.beam_width, self.max_states - len(states)):
+                        heapq.heappush(children, (-bound, child))
+                    else:
+                        heapq.heappushpop(children, (-bound, child))
+                        self.dropped += 1
+
+            states = children
+
+        for key, path in states:
+            self.go_to(path)
+            self.check_solution()
+
+
+    def trim(self, queue):
+        """Keeps the KEEP fraction of the states with the lowest bounds of a full queue. A sorted list is a heap,
+        so the queue is sorted and cut in place.
+
+        Parameters
+        ----------
+        queue : list
+        """
+
+        keep = min(int(self.max_states * KEEP), self.max_states - 1)
+        queue.sort()
+
+        self.dropped += len(queue) - keep
+        del queue[keep:]
+
+
+    def expand(self, path):
+        """Yields the children of a state that can beat the best solution, with their bounds. The district is back
+        at the state before every child is yielded.
+
+        Parameters
+        ----------
+        path : tuple
+            Battery IDs of the connected free houses
+
+        Yields
+        ----------
+        tuple
+            Bound and path of a child (BOUND, PATH)
+        """
+
+        self.go_to(path)
+
+        for bound, battery in self.calc_child_bounds(len(path)):
+            yield bound, path + (battery.id,)
+
+
+    def go_to(self, path):
+        """Brings the district to a state by undoing the connections after the part of its path that is shared
+        with the current state, and connecting the rest of the path.
+
+        Parameters
+        ----------
+        path : tuple
+        """
+
+        shared = 0
+        while shared < min(len(path), len(self.log)) and self.log[shared].id == path[shared]:
+            shared += 1
+
+        self.undo(shared)
+
+        for depth in range(shared, len(path)):
+            self.connect(depth, self.district.batteries[path[depth]])
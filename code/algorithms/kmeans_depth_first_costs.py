@@ -3,147 +3,270 @@ based on a capacity offset. These are removed from the batteries, to create free
 The algorithm then does a depth first search for the best configuration based on the minimal cost of a state it can find by
 reassigning all free houses. 
 Pruning is done by selecting the two best options of the five diversions from every branch. 
+In branch and bound mode all diversions are searched, lowest bound first, and subtrees are cut when a lower bound
+of their costs can not beat the best solution found. The bound is kept up to date while houses are connected and
+disconnected, and a time limit stops the search with the best solution found so far.
 """
 
-import copy
-
-from .algorithm import Algorithm
+from .depth_first_search import DepthFirstSearch
 
 CAPACITY_OFFSET = 200
 N = 2
 
-class DepthFirstCosts(Algorithm):
+class DepthFirstCosts(DepthFirstSearch):
     """A Depth First algorithm that selects houses that are close to clusters other than their own, and
     disconnects those from their batteries until the capacity offset is reached. It then performs a depth first
     search for the best configuration. Pruning is done by selecting the two best options of the five diversions from 
-    every branch.
+    every branch. In branch and bound mode every battery with capacity left is a child, and a state is cut when its
+    lower bound is not below the best total found. The lower bound is the current costs plus, for every free house,
+    the costs of its cheapest battery with capacity left, plus the regret of the houses that do not fit in their
+    cheapest battery together. Batteries only fill up deeper in the tree, so no free house can be connected
+    cheaper, and the search stays exact for the free houses. The search itself is done by the DepthFirstSearch
+    core, which connects and disconnects houses in the district.
+
+    The bound is not rebuilt for every state. For every free house the cheapest and second cheapest battery with
+    capacity left are stored. Connecting a house only takes room from one battery, so only the free houses that
+    chose that battery are checked again, and the changes are logged so that disconnecting the house restores them.
+    The regret of a battery is only recalculated when its usage or the houses that prefer it change. The bound of
+    every child is calculated when the children are built: children that can not beat the best solution are cut
+    before they are searched, and the child with the lowest bound is searched first, so a good solution is found
+    early. If the time limit stops the search, the best solution found so far is kept, or the configuration the
+    search started from when none was found.
+
+    The given district is changed in place instead of copied, so an optimization that is built on the same district
+    continues from the result. A snapshot taken when run() starts restores the district, cables included, when no
+    solution is found.
 
     Parameters
     ----------
     district : District object
 
+    branch_and_bound : bool
+
+    processes : int
+
+    verbose : bool
+
+    time_limit : float
+
     Methods
     ----------
     run()
         Runs the algorithm.
 
-    get_next_state()
-        Get next state from the back of the stack.
+    build_children(depth)
+        Returns the batteries of the child states, the first searched first.
+
+    calc_child_bounds(depth)
+        Returns the lower bounds of the child states that can beat the best solution.
 
-    build_children(connections, house)
-        Creates all possible child-states and adds them to the list of states.
+    is_cut(depth)
+        Returns if the lower bound of the state can not beat the best solution.
 
-    check_solution(new_connections)
+    get_state_value()
+        Returns the connection costs of the state.
+
+    check_solution()
         Checks for the best solution and accepts that state.
 
-    get_best_child(children, n)
-        Returns the child state with the lowest cost.
+    get_best_value(), set_best_value(value)
+        Returns or replaces the best total costs.
 
-    remove_connections(connections)
-        Remove connections from a district
+    get_best_batteries(house, batteries, n)
+        Returns the batteries with the lowest connection costs.
+
+    prepare()
+        Stores the cheapest batteries of the free houses for the lower bound.
+
+    connect(depth, battery), undo(depth)
+        Connects or disconnects houses and updates the lower bound.
+
+    choose_batteries(house)
+        Returns the cheapest and second cheapest battery with capacity left for a free house.
 
-    calc_battery_connection_costs(connections, battery)
-        Calculates costs of connection to one battery.
+    set_choice(house, choice, changes)
+        Replaces the batteries chosen by a free house.
 
-    calc_connection_costs(connections)
-        Calculates the total cost of the district.
+    calc_regret(battery_id)
+        Returns the regret of the houses that do not fit in a battery together.
+
+    calc_lower_bound()
+        Returns a lower bound of the costs of all configurations below the current state.
+
+    remove_connections(connections)
+        Remove connections from a district
     """
 
-    def __init__(self, district):
+    def __init__(self, district, branch_and_bound=False, processes=1, verbose=True, time_limit=None):
         """Parameters
         ----------
         district : District object
+
+        branch_and_bound : bool
+            Search all children cheapest first and cut states that can not beat the best solution
+
+        processes : int
+            Number of worker processes that search subtrees
+
+        verbose : bool
+            Print every better solution
+
+        time_limit : float
+            Seconds after which the search stops with the best solution found, None to search all states
         """
 
-        self.district = copy.deepcopy(district)
-        self.connections = self.remove_connections(self.district.connections)
-        self.states = [copy.copy(self.connections)]
-        self.best_solution = None
+        super().__init__(district, processes, verbose, time_limit)
+        self.connections = None
         self.best_total = float('inf')
-        self.iterations = 0
+        self.branch_and_bound = branch_and_bound
+        self.pruned = 0
+
+        # batteries by connection costs for every house
+        self.orders = [sorted(range(len(costs)), key=lambda battery_id: costs[battery_id]) \
+            for costs in district.costs]
+
+        # cheapest and second cheapest battery with capacity left of every free house {HOUSE_ID: (ID, ID)}
+        self.choices = {}
+
+        # houses that prefer a battery {BATTERY_ID: {HOUSE_ID: (REGRET PER OUTPUT, OUTPUT)}}
+        self.preferred = {}
+
+        # houses that chose a battery as cheapest or second cheapest {BATTERY_ID: {HOUSE_ID: HOUSE}}
+        self.choosers = {}
+
+        # regret of every battery, removed when its usage or the houses that prefer it change {BATTERY_ID: REGRET}
+        self.regrets = {}
+
+        # old choices of the free houses changed by every connected house
+        self.changes = []
+
+        # connection costs of the cheapest batteries, and number of free houses that fit in no battery
+        self.first_costs = 0
+        self.stuck = 0
+
+        # output and smallest output of the free houses below every depth
+        self.free_outputs = []
+        self.min_outputs = []
 
 
     def run(self):
-        """Runs the algorithm untill all possible states are visited.
+        """Runs the algorithm untill all possible states are visited, or the time limit is reached.
 
         Returns
         ----------
         District object
-            Best found configuration
+            The given district, with the best found configuration
         """
-    
-        while self.states:
-            new_connections = self.get_next_state()
 
-            # set the district connections
-            self.district.set_connections(new_connections)
+        start = self.district.snapshot()
 
-            # retrieve the next empty house
-            house = self.district.get_empty_house()
+        # free the houses on the cluster borders
+        self.connections = self.remove_connections(self.district.connections)
 
-            if house is not None:
-                self.build_children(new_connections, house)
-                
-            else:
+        # search the free houses, the most recently freed first
+        self.search(self.district.get_empty_houses())
 
-                # continue looking for better districts.
-                self.check_solution(new_connections)
+        if self.timed_out and self.verbose:
+            print(f'Time limit reached, best costs found: {self.best_total}, iterations {self.iterations}')
 
-            self.iterations += 1
-            
-        # update the input district with the best result found
-        self.district.set_connections(self.best_solution)
+        # keep the start when no solution was found in time
+        if self.best_solution is None:
+            self.district.restore(start)
+        else:
+            # update the input district with the best result found
+            self.district.set_assignment(self.best_solution)
 
         return self.district
 
 
-    def get_next_state(self):
-        """Get next state from the back of the stack.
+    def build_children(self, depth):
+        """Returns the batteries of the child states, the first searched first. In branch and bound mode the
+        children that can beat the best solution, the lowest bound first, otherwise the N cheapest ones.
+
+        Parameters
+        ----------
+        depth : int
 
         Returns
         ----------
-        dict
+        list
         """
 
-        return self.states.pop()
-        
+        if self.branch_and_bound:
+            return [battery for bound, battery in self.calc_child_bounds(depth)]
+
+        house = self.houses[depth]
+
+        # retrieves all free batteries the house can connect to
+        batteries = self.district.get_possible_batteries(house)
 
-    def build_children(self, connections, house):
-        """Creates all possible child-states and adds them to the list of states.
+        return self.get_best_batteries(house, batteries, N)
+
+
+    def calc_child_bounds(self, depth):
+        """Returns the lower bounds of the child states that can beat the best solution, the lowest bound first
+        and the cheapest connection on equal bounds. The other children are cut.
 
         Parameters
         ----------
-        connections : dict
+        depth : int
 
-        house : House object
+        Returns
+        ----------
+        list
+            Bound and battery of every child [(BOUND, BATTERY)]
         """
 
-        # retrieves all free batteries the house can connect to
-        batteries = self.district.get_possible_batteries(house)
-
+        house = self.houses[depth]
         children = []
 
-        # add an instance to the stack with each possible battery connection
-        for battery in batteries:
+        for battery in self.district.get_possible_batteries(house):
+            self.connect(depth, battery)
+            bound = self.calc_lower_bound()
+            self.undo(depth)
 
-            # copy connections
-            new_connections = {}
-            for key, value in connections.items():
-                new_connections[key] = copy.copy(value)
-        
-            new_connections[battery.id].append(house)
-            children.append(new_connections)
+            if bound < self.best_total:
+                children.append((bound, self.district.calc_move_delta(house, battery), battery))
+            else:
+                self.pruned += 1
 
-        best_children = self.get_best_child(children, N)
-        self.states += best_children
-        
-    
-    def check_solution(self, new_connections):
-        """Checks and accepts better solutions than the current solution.
+        children.sort(key=lambda child: child[:2])
+
+        return [(bound, battery) for bound, delta, battery in children]
+
+
+    def is_cut(self, depth):
+        """Returns if in branch and bound mode the lower bound of the state can not beat the best solution.
 
         Parameters
         ----------
-        new_connections : dict
+        depth : int
+
+        Returns
+        ----------
+        bool
+        """
+
+        if self.branch_and_bound and self.calc_lower_bound() >= self.best_total:
+            self.pruned += 1
+            return True
+
+        return False
+
+
+    def get_state_value(self):
+        """Returns the connection costs of the state for the transposition table.
+
+        Returns
+        ----------
+        int
+        """
+
+        return self.district.calc_connection_costs()["connections"]
+        
+    
+    def check_solution(self):
+        """Checks and accepts better solutions than the current solution.
         """
 
         res = self.district.calc_connection_costs()
@@ -153,88 +276,290 @@ class DepthFirstCosts(Algorithm):
 
         # update the cost if the district total is less
         if new_total <= old_total:
-            self.best_solution = new_connections
+            self.best_solution = self.district.get_assignment()
             self.best_total = new_total
 
-            print(f'Found better solution, costs: {new_total}, iterations {self.iterations}')
+            if self.verbose:
+                print(f'Found better solution, costs: {new_total}, iterations {self.iterations}')
+
+
+    def get_best_value(self):
+        """Returns the best total costs.
+
+        Returns
+        ----------
+        float
+        """
 
+        return self.best_total
 
-    def get_best_child(self, children, n):
-        """Returns the child state with the lowest cost.
+
+    def set_best_value(self, value):
+        """Replaces the best total costs.
 
         Parameters
         ----------
-        children : list
-            New district states to evaluate
+        value : float
+        """
+
+        self.best_total = value
+
+
+    def get_best_batteries(self, house, batteries, n):
+        """Returns the batteries that give the child states with the lowest cost. The costs of a child
+        differ from the current state by the connection costs of the house only.
+
+        Parameters
+        ----------
+        house : House object
+            House to connect in the child states
+
+        batteries : list
+            Batteries the house can connect to
         
         n : int
             Amount of pruning to do
 
         Returns
         ----------
-        dict
-            Best configuration of the evaluated children
+        list
+            Batteries of the best children, cheapest first
         """
 
-        children.sort(key=lambda connections: self.calc_connection_costs(connections))
+        return sorted(batteries, key=lambda battery: self.district.calc_move_delta(house, battery))[:n]
 
-        return children[:n]
 
-    
-    def remove_connections(self, connections):
-        """Removes connections from a district.
+    def prepare(self):
+        """Stores the cheapest and second cheapest battery with capacity left of every free house, and the
+        output of the free houses below every depth, in branch and bound mode.
+        """
+
+        if not self.branch_and_bound:
+            return
+
+        self.choices = {}
+        self.preferred = {battery.id: {} for battery in self.district.batteries}
+        self.choosers = {battery.id: {} for battery in self.district.batteries}
+        self.regrets = {}
+        self.changes = []
+        self.first_costs = 0
+        self.stuck = 0
+
+        for house in self.houses:
+            self.set_choice(house, self.choose_batteries(house))
+
+        outputs = [house.output for house in self.houses]
+        self.free_outputs = [sum(outputs[depth:]) for depth in range(len(outputs) + 1)]
+        self.min_outputs = [min(outputs[depth:], default=0) for depth in range(len(outputs) + 1)]
+
+
+    def connect(self, depth, battery):
+        """Connects the house at a depth to a battery. In branch and bound mode the house is no longer free,
+        and the free houses that chose the battery choose again if they no longer fit in it.
 
         Parameters
         ----------
-        connections : dict
+        depth : int
+
+        battery : Battery object
+        """
+
+        super().connect(depth, battery)
+
+        if not self.branch_and_bound:
+            return
+
+        changes = []
+        self.set_choice(self.houses[depth], None, changes)
+        self.regrets.pop(battery.id, None)
+
+        for house in list(self.choosers[battery.id].values()):
+            choice = self.choose_batteries(house)
+
+            if choice != self.choices[house.id]:
+                self.set_choice(house, choice, changes)
+
+        self.changes.append(changes)
+
+
+    def undo(self, depth):
+        """Disconnects the houses at and below a depth, the deepest first. In branch and bound mode the logged
+        choices of the free houses are restored.
+
+        Parameters
+        ----------
+        depth : int
+        """
+
+        while len(self.log) > max(depth, 0):
+            battery = self.log[-1]
+            super().undo(len(self.log) - 1)
+
+            if not self.branch_and_bound:
+                continue
+
+            for house, choice in reversed(self.changes.pop()):
+                self.set_choice(house, choice)
+
+            self.regrets.pop(battery.id, None)
+
+
+    def choose_batteries(self, house):
+        """Returns the cheapest and second cheapest battery with capacity left for a free house.
+
+        Parameters
+        ----------
+        house : House object
 
         Returns
         ----------
-        dict
+        tuple
+            Battery IDs, None for a missing battery
         """
 
-        # remove connections
-        for battery in self.district.batteries:
+        usage = self.district.usage
+        batteries = self.district.batteries
+        first = None
 
-            while self.district.get_usage(battery) > (battery.capacity - CAPACITY_OFFSET):
+        for battery_id in self.orders[house.id]:
+            if usage[battery_id] + house.output <= batteries[battery_id].capacity:
+                if first is not None:
+                    return (first, battery_id)
+                first = battery_id
 
-                # remove house
-                house = connections[battery.id].pop(0)
-                self.district.houses.remove(house)
-                self.district.houses.insert(0, house)
-                
-        houses = []
-        for value in connections.values():
-            houses += value
+        return (first, None)
 
-        return connections
 
+    def set_choice(self, house, choice, changes=None):
+        """Replaces the batteries chosen by a free house and updates the costs of the cheapest batteries and
+        the houses that prefer every battery. The old choice is logged in the changes.
+
+        Parameters
+        ----------
+        house : House object
+
+        choice : tuple
+            Cheapest and second cheapest battery ID, None when the house is no longer free
+
+        changes : list
+            Log of old choices [(HOUSE, CHOICE)]
+        """
+
+        costs = self.district.costs[house.id]
+        old = self.choices.pop(house.id, None)
+
+        if changes is not None:
+            changes.append((house, old))
+
+        if old is not None:
+            first, second = old
+
+            if first is None:
+                self.stuck -= 1
+            else:
+                self.first_costs -= costs[first]
+                del self.preferred[first][house.id]
+                del self.choosers[first][house.id]
+                self.regrets.pop(first, None)
+
+            if second is not None:
+                del self.choosers[second][house.id]
+
+        if choice is None:
+            return
+
+        self.choices[house.id] = choice
+        first, second = choice
+
+        if first is None:
+            self.stuck += 1
+            return
 
-    def calc_battery_connections_costs(self,connections, battery):
-        """Calculates costs of connection to one battery.
+        regret = costs[second] - costs[first] if second is not None else float('inf')
+        self.first_costs += costs[first]
+        self.preferred[first][house.id] = (regret / house.output, house.output)
+        self.choosers[first][house.id] = house
+        self.regrets.pop(first, None)
+
+        if second is not None:
+            self.choosers[second][house.id] = house
+
+
+    def calc_regret(self, battery_id):
+        """Returns the regret of the houses that prefer a battery but do not fit in it together: the cheapest
+        regret per unit of output that covers the overflow, allowing fractions of houses.
 
         Parameters
         ----------
-        connections : dict
+        battery_id : int
 
-        battery : Battery object
+        Returns
+        ----------
+        float
+        """
+
+        if battery_id in self.regrets:
+            return self.regrets[battery_id]
+
+        preferences = self.preferred[battery_id]
+        overflow = sum(output for ratio, output in preferences.values()) \
+            + self.district.usage[battery_id] - self.district.batteries[battery_id].capacity
+        regret = 0
+
+        # move the houses with the least regret per unit of output until the overflow fits
+        for ratio, output in sorted(preferences.values()):
+            if overflow <= 0:
+                break
+
+            regret += ratio * min(output, overflow)
+            overflow -= output
+
+        self.regrets[battery_id] = regret
+
+        return regret
+
+
+    def calc_lower_bound(self):
+        """Returns a lower bound of the total costs of every configuration below the current state: the
+        current costs plus the costs of the cheapest battery with capacity left for every free house. When the
+        houses that prefer a battery do not fit in it together, some of them pay at least their regret, the
+        difference with their second cheapest battery. The cheapest regret per unit of output that covers the
+        overflow is added, allowing fractions of houses. The stored choices of the free houses are used, so
+        the search must be prepared.
 
         Returns
         ----------
         float
+            Lower bound, infinite if a free house does not fit in any battery or the free houses do not fit in
+            the batteries together
         """
 
-        houses = connections[battery.id]
-        costs = 0
+        if self.stuck:
+            return float('inf')
 
-        for house in houses:
-            costs += self.calc_dist(house.location, battery.location) * 9
+        depth = len(self.log)
 
-        return costs
+        # capacity left that is smaller than every free house can not be used
+        free_capacity = 0
+        for battery in self.district.batteries:
+            capacity = battery.capacity - self.district.usage[battery.id]
+
+            if capacity >= self.min_outputs[depth]:
+                free_capacity += max(capacity, 0)
+
+        if free_capacity < self.free_outputs[depth]:
+            return float('inf')
 
+        bound = self.district.calc_connection_costs()["total"] + self.first_costs
 
-    def calc_connection_costs(self, connections):
-        """Calculates the total cost of the district.
+        for battery in self.district.batteries:
+            bound += self.calc_regret(battery.id)
+
+        return bound
+
+    
+    def remove_connections(self, connections):
+        """Removes connections from a district.
 
         Parameters
         ----------
@@ -242,16 +567,16 @@ class DepthFirstCosts(Algorithm):
 
         Returns
         ----------
-        float
+        dict
         """
 
-        connections_cost = 0
-        batt_cost = 0
-
+        # remove connections
         for battery in self.district.batteries:
-            batt_cost += battery.cost
-            connections_cost += self.calc_battery_connections_costs(connections, battery)
 
-        costs =  connections_cost + batt_cost
+            while self.district.get_usage(battery) > (battery.capacity - CAPACITY_OFFSET):
 
-        return costs
\ No newline at end of file
+                # remove house
+                house = connections[battery.id][0]
+                self.district.remove_connection(battery, house)
+
+        return connections
@@ -5,45 +5,48 @@ reassigning all free houses.
 Pruning is done by selecting the two best options of the five diversions from every branch. 
 """
 
-import copy
-
-from .algorithm import Algorithm
+from .depth_first_search import DepthFirstSearch
 
 CAPACITY_OFFSET = 300
 N = 2
 
-class DepthFirstLength(Algorithm):
+class DepthFirstLength(DepthFirstSearch):
     """A Depth First algorithm that selects houses that are close to clusters other than their own, and
     disconnects those from their batteries until the capacity offset is reached. It then performs a depth first
     search for the best configuration. Pruning is done by selecting the two best options of the five diversions from 
-    every branch.
+    every branch. The search itself is done by the DepthFirstSearch core, which connects and disconnects houses in
+    the district. The given district is not copied: run() leaves the best configuration in it, or restores a
+    snapshot of the start when the free houses do not fit.
 
     Parameters
     ----------
     district : District object
 
+    clusters : list
+
+    processes : int
+
+    verbose : bool
+
     Methods
     ----------
     run()
         Runs the algorithm.
 
-    get_next_state()
-        Get next state from the back of the stack.
+    build_children(depth)
+        Returns the batteries of the child states, the first searched first.
 
-    build_children(connections, house)
-        Creates all possible child-states and adds them to the list of states.
+    get_state_value()
+        Returns the longest connection of the connected free houses.
 
-    check_solution(new_connections)
+    check_solution()
         Checks for the best solution and accepts that state.
 
+    get_best_value(), set_best_value(value)
+        Returns or replaces the best longest connection.
+
     remove_connections(connections)
         Remove connections from a district.
-
-    calc_battery_connection_costs(connections, battery)
-        Calculates costs of connection to one battery.
-
-    calc_connection_costs(connections)
-        Calculates the total cost of the district.
     
     get_longest_connection(connections)
         Returns the maximum connection distance in a cluster.
@@ -51,28 +54,31 @@ class DepthFirstLength(Algorithm):
     get_connection_len(battery, house)
         Calculates distance of a house to a cluster centroid.
 
-    add_best_children(connections, children, n)
-        Adds the pruned child states to the stack.
+    add_best_children(children, n)
+        Returns the batteries of the pruned child states.
     """
 
-    def __init__(self, district, clusters):
+    def __init__(self, district, clusters, processes=1, verbose=True):
         """Parameters
         ----------
         district : District object
 
         clusters : list
             Formed clusters in the district
+
+        processes : int
+            Number of worker processes that search subtrees
+
+        verbose : bool
+            Print every better solution
         """
 
-        self.district = copy.deepcopy(district)
-        self.connections = self.remove_connections(self.district.connections)
-        self.states = [copy.copy(self.connections)]
+        super().__init__(district, processes, verbose)
+        self.connections = None
         self.clusters = clusters
 
-        self.best_solution = None
         self.best_total = float('inf')
         self.longest_connection = float('inf')
-        self.iterations = 0
 
 
     def run(self):
@@ -81,56 +87,41 @@ class DepthFirstLength(Algorithm):
         Returns
         ----------
         District object
-            Best found configuration
+            The given district, with the best found configuration
         """
-    
-        while self.states:
-            new_connections = self.get_next_state()
-
-            # set the district connections
-            self.district.set_connections(new_connections)
-
-            # retrieve the next empty house
-            house = self.district.get_empty_house()
 
-            if house is not None:
-                self.build_children(new_connections, house)
-                
-            else:
+        start = self.district.snapshot()
 
-                # continue looking for better districts.
-                self.check_solution(new_connections)
-
-            self.iterations += 1
+        # free the houses on the cluster borders
+        self.connections = self.remove_connections(self.district.connections)
 
-        # update the input district with the best result found
-        self.district.set_connections(self.best_solution)
+        # search the free houses, the most recently freed first
+        self.search(self.district.get_empty_houses())
 
+        # keep the start when the free houses do not fit
+        if self.best_solution is None:
+            self.district.restore(start)
+        else:
+            # update the input district with the best result found
+            self.district.set_assignment(self.best_solution)
 
         return self.district
     
 
-    def get_next_state(self):
-        """Get next state from the back of the stack.
-
-        Returns
-        ----------
-        dict
-        """
-
-        return self.states.pop()
-
-
-    def build_children(self, connections, house):
-        """Creates all possible child-states and adds them to the list of states.
+    def build_children(self, depth):
+        """Returns the batteries of the child states, the closest cluster centroid first.
 
         Parameters
         ----------
-        connections : dict
+        depth : int
 
-        house : House object
+        Returns
+        ----------
+        list
         """
 
+        house = self.houses[depth]
+
         # retrieves all free batteries the house can connect to
         batteries = self.district.get_possible_batteries(house)
 
@@ -140,95 +131,82 @@ class DepthFirstLength(Algorithm):
             
             children.append([battery, house])
             
-        self.add_best_children(connections, children, N)
+        return self.add_best_children(children, N)
+
+
+    def get_state_value(self):
+        """Returns the longest connection of the connected free houses for the transposition table.
+
+        Returns
+        ----------
+        float
+        """
+
+        return max((self.get_connection_len(battery, house) for battery, house in zip(self.log, self.houses)), \
+            default=0)
         
     
-    def check_solution(self, new_connections):
+    def check_solution(self):
         """Checks and accepts better solutions than the current solution.
-
-        Parameters
-        ----------
-        new_connections : dict
         """
 
-        new_connection = self.get_longest_connection(new_connections)
+        new_connection = self.get_longest_connection(self.district.connections)
         old_connection = self.longest_connection
 
         # update the cost if the district total is less
         if new_connection < old_connection:
-            self.best_solution = new_connections
+            self.best_solution = self.district.get_assignment()
             self.longest_connection = new_connection
-            total = self.calc_connection_costs(new_connections)
+            total = self.district.calc_connection_costs()['total']
 
-            print(f'Found better solution, costs: {total}, iterations {self.iterations}')
+            if self.verbose:
+                print(f'Found better solution, costs: {total}, iterations {self.iterations}')
 
     
-    def remove_connections(self, connections):
-        """Removes connections from a district.
-
-        Parameters
-        ----------
-        connections : dict
+    def get_best_value(self):
+        """Returns the best longest connection.
 
         Returns
         ----------
-        dict
+        float
         """
 
-        # remove connections
-        for battery in self.district.batteries:
-
-            while self.district.get_usage(battery) > (battery.capacity - CAPACITY_OFFSET):
+        return self.longest_connection
 
-                # remove house
-                house = connections[battery.id].pop(0)
-                self.district.houses.remove(house)
-                self.district.houses.insert(0, house)
-        
-        houses = []
-        for value in connections.values():
-            houses += value
-        return connections
 
+    def set_best_value(self, value):
+        """Replaces the best longest connection.
 
-    def calc_battery_connections_costs(self,connections, battery):
-        """
-        Calculates costs of connection to battery
+        Parameters
+        ----------
+        value : float
         """
 
-        houses = connections[battery.id]
-        costs = 0
-
-        for house in houses:
-            costs += self.calc_dist(house.location, battery.location) * 9
-
-        return costs
-
+        self.longest_connection = value
 
-    def calc_connection_costs(self, connections):
-        """Calculates costs of connection to one battery.
+    
+    def remove_connections(self, connections):
+        """Removes connections from a district.
 
         Parameters
         ----------
         connections : dict
 
-        battery : Battery object
-
         Returns
         ----------
-        float
+        dict
         """
 
-        connections_cost = 0
-        batt_cost = 0
-
+        # remove connections
         for battery in self.district.batteries:
-            batt_cost += battery.cost
-            connections_cost += self.calc_battery_connections_costs(connections, battery)
 
-        costs =  connections_cost + batt_cost
+            while self.district.get_usage(battery) > (battery.capacity - CAPACITY_OFFSET):
+
+                # remove house
+                house = connections[battery.id][0]
+                self.district.remove_connection(battery, house)
 
-        return costs
+        return connections
 
 
     def get_longest_connection(self, connections):
@@ -280,28 +258,22 @@ class DepthFirstLength(Algorithm):
         return self.calc_dist(centroid, house.location)
 
 
-    def add_best_children(self,connections, children, n):
-        """Adds the pruned child states to the stack.
+    def add_best_children(self, children, n):
+        """Returns the batteries of the pruned child states, the closest cluster centroid first.
 
         Parameters
         ----------
-        connections : dict
-
         children : list
-            New district states to evaluate
+            New connections to evaluate [BATTERY, HOUSE]
         
         n : int
             Amount of pruning to do
+
+        Returns
+        ----------
+        list
         """
 
         children.sort(key=lambda temp: self.get_connection_len(temp[0], temp[1]))
 
-        for battery, house in children[:n]:
-    
-            # copy connections
-            new_connections = {}
-            for key, value in connections.items():
-                new_connections[key] = copy.copy(value)
-
-            new_connections[battery.id].append(house)
-            self.states.append(new_connections)
\ No newline at end of file
+        return [battery for battery, house in children[:n]]
@@ -0,0 +1,279 @@
+"""LocalSearch improves a configurated district with unique cables by moving houses between batteries. It combines
+three neighbourhoods: shifting a house to a battery with capacity left, swapping two houses of different batteries
+and rotating three houses of three batteries. Moves are evaluated by their change in costs and capacity, without
+modifying the district, and houses that can not be improved are skipped until one of their moves changes.
+"""
+
+from collections import deque
+
+import numpy
+
+from .algorithm import Algorithm
+from ..classes.district_arrays import FREE
+
+NEIGHBOURHOODS = ('shift', 'swap', 'cycle')
+
+class LocalSearch(Algorithm):
+    """Local search with shift, swap and 3-cycle moves. Houses wait in a queue, the longest connection first. For
+    every house the moves it takes part in are evaluated at once with NumPy. With the 'first' policy the first
+    neighbourhood with an improving move is used, with the 'best' policy the best move of all neighbourhoods.
+    A house that has no improving move gets its "don't look" bit set and leaves the queue, until it takes part in
+    a move of another house. When the queue is empty after moves were made, all houses are checked once more.
+
+    Methods
+    ----------
+    run()
+        Runs the LocalSearch algorithm
+
+    find_move(house_id)
+        Finds an improving move for a house
+
+    find_shift(house_id)
+        Finds the best shift of a house to another battery
+
+    find_swap(house_id)
+        Finds the best swap of a house with a house of another battery
+
+    find_cycle(house_id)
+        Finds the best rotation of a house with two houses of two other batteries
+
+    apply_move(moves)
+        Connects houses to their new batteries
+    """
+
+    def __init__(self, district, policy='best', neighbourhoods=NEIGHBOURHOODS):
+        """Parameters
+        ----------
+        district : District object
+            A district with a configuration for unique cables
+
+        policy : str
+            'first' to use the first neighbourhood with an improving move, 'best' to use the best move
+
+        neighbourhoods : tuple
+            Neighbourhoods to search, in order
+        """
+
+        self.district = district
+        self.iterations = 0
+        self.policy = policy
+        self.neighbourhoods = neighbourhoods
+
+        self.houses = {}
+        self.assignment = None
+        self.usage = None
+
+
+    def run(self):
+        """Runs the LocalSearch algorithm
+
+        Returns
+        ----------
+        District object
+        """
+
+        arrays = self.district.arrays
+        self.houses = {house.id: house for house in self.district.houses}
+        self.assignment = self.district.get_assignment()
+        self.usage = arrays.calc_usage(self.assignment)
+
+        # houses to look at, the longest connection first
+        connected = numpy.nonzero(self.assignment != FREE)[0]
+        house_ids = sorted(connected.tolist(), key=lambda house_id: \
+            arrays.distances[house_id, self.assignment[house_id]], reverse=True)
+
+        queue = deque(house_ids)
+        looking = set(house_ids)
+        improved = False
+
+        while queue:
+            self.iterations += 1
+            house_id = queue.popleft()
+            looking.discard(house_id)
+
+            move = self.find_move(house_id)
+
+            if move is not None:
+                self.apply_move(move)
+                improved = True
+
+                # look at the moved houses again
+                for moved_id, battery_id in move:
+                    if moved_id not in looking:
+                        queue.append(moved_id)
+                        looking.add(moved_id)
+
+            # check all houses once more, since capacity changes can allow new moves
+            if not queue and improved:
+                queue.extend(house_ids)
+                looking.update(house_ids)
+                improved = False
+
+        # set district cables
+        self.set_district_cables(self.district)
+        return self.district
+
+
+    def find_move(self, house_id):
+        """Finds an improving move for a house with the policy of the algorithm.
+
+        Parameters
+        ----------
+        house_id : int
+
+        Returns
+        ----------
+        list
+            New battery of every house in the move [(HOUSE_ID, BATTERY_ID)], or None if there is no improving move
+        """
+
+        best_delta = 0
+        best_move = None
+
+        for neighbourhood in self.neighbourhoods:
+            delta, move = getattr(self, 'find_' + neighbourhood)(house_id)
+
+            if delta < best_delta:
+                best_delta = delta
+                best_move = move
+
+                if self.policy == 'first':
+                    break
+
+        return best_move
+
+
+    def find_shift(self, house_id):
+        """Finds the best shift of a house to another battery that has capacity left.
+
+        Parameters
+        ----------
+        house_id : int
+
+        Returns
+        ----------
+        tuple
+            Change in costs and the move
+        """
+
+        arrays = self.district.arrays
+        battery_id = self.assignment[house_id]
+
+        deltas = arrays.costs[house_id] - arrays.costs[house_id, battery_id]
+
+        feasible = self.usage + arrays.outputs[house_id] <= arrays.capacities
+        feasible[battery_id] = False
+
+        if not feasible.any():
+            return 0, None
+
+        deltas = numpy.where(feasible, deltas, 0)
+        new_battery_id = int(numpy.argmin(deltas))
+
+        return int(deltas[new_battery_id]), [(house_id, new_battery_id)]
+
+
+    def find_swap(self, house_id):
+        """Finds the best swap of a house with a house of another battery, if both batteries stay within
+        capacity.
+
+        Parameters
+        ----------
+        house_id : int
+
+        Returns
+        ----------
+        tuple
+            Change in costs and the move
+        """
+
+        arrays = self.district.arrays
+        outputs = arrays.outputs
+        capacities = arrays.capacities
+        battery_id = self.assignment[house_id]
+        batteries = numpy.maximum(self.assignment, 0)
+        costs = arrays.costs[numpy.arange(len(batteries)), batteries]
+
+        deltas = arrays.costs[house_id, batteries] - arrays.costs[house_id, battery_id] \
+            + arrays.costs[:, battery_id] - costs
+
+        feasible = (self.assignment != FREE) & (batteries != battery_id) \
+            & (self.usage[batteries] - outputs + outputs[house_id] <= capacities[batteries]) \
+            & (self.usage[battery_id] - outputs[house_id] + outputs <= capacities[battery_id])
+
+        deltas = numpy.where(feasible, deltas, 0)
+        swap_id = int(numpy.argmin(deltas))
+
+        return int(deltas[swap_id]), [(house_id, int(batteries[swap_id])), (swap_id, int(battery_id))]
+
+
+    def find_cycle(self, house_id):
+        """Finds the best rotation in which a house moves to the battery of a second house, the second house
+        to the battery of a third house and the third house to the battery of the first, all three batteries
+        different and within capacity.
+
+        Parameters
+        ----------
+        house_id : int
+
+        Returns
+        ----------
+        tuple
+            Change in costs and the move
+        """
+
+        arrays = self.district.arrays
+        outputs = arrays.outputs
+        capacities = arrays.capacities
+        battery_id = self.assignment[house_id]
+        batteries = numpy.maximum(self.assignment, 0)
+        connected = (self.assignment != FREE) & (batteries != battery_id)
+        costs = arrays.costs[numpy.arange(len(batteries)), batteries]
+
+        # the first house moves to the battery of the second house (rows)
+        first = arrays.costs[house_id, batteries] - arrays.costs[house_id, battery_id]
+        first_fits = self.usage[batteries] + outputs[house_id] - outputs <= capacities[batteries]
+
+        # the third house (columns) moves to the battery of the first house
+        third = arrays.costs[:, battery_id] - costs
+        third_fits = self.usage[battery_id] - outputs[house_id] + outputs <= capacities[battery_id]
+
+        # the second house moves to the battery of the third house
+        second = arrays.costs[:, batteries] - costs[:, None]
+        second_fits = self.usage[batteries][None, :] + outputs[:, None] - outputs[None, :] \
+            <= capacities[batteries][None, :]
+
+        deltas = first[:, None] + second + third[None, :]
+        feasible = (connected & first_fits)[:, None] & (connected & third_fits)[None, :] & second_fits \
+            & (batteries[:, None] != batteries[None, :])
+
+        deltas = numpy.where(feasible, deltas, 0)
+        second_id, third_id = numpy.unravel_index(int(numpy.argmin(deltas)), deltas.shape)
+        second_id, third_id = int(second_id), int(third_id)
+
+        move = [(house_id, int(batteries[second_id])), (second_id, int(batteries[third_id])), \
+            (third_id, int(battery_id))]
+
+        return int(deltas[second_id, third_id]), move
+
+
+    def apply_move(self, moves):
+        """Connects every house of a move to its new battery.
+
+        Parameters
+        ----------
+        moves : list
+            New battery of every house [(HOUSE_ID, BATTERY_ID)]
+        """
+
+        outputs = self.district.arrays.outputs
+
+        for house_id, battery_id in moves:
+            current_id = int(self.assignment[house_id])
+            self.district.remove_connection(self.district.batteries[current_id], self.houses[house_id])
+            self.usage[current_id] -= outputs[house_id]
+
+        for house_id, battery_id in moves:
+            self.district.add_connection(self.district.batteries[battery_id], self.houses[house_id])
+            self.assignment[house_id] = battery_id
+            self.usage[battery_id] += outputs[house_id]
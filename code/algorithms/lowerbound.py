@@ -57,4 +57,4 @@ class LowerBound(Algorithm):
 
         batteries = self.district.batteries
     
-        return min(batteries, key=lambda battery: self.calc_dist(house.location, battery.location))
\ No newline at end of file
+        return min(batteries, key=lambda battery: self.district.distances[house.id][battery.id])
\ No newline at end of file
@@ -92,5 +92,5 @@ class RandomOptimize(Algorithm):
         if not possible_batteries:
             return None
     
-        return min(possible_batteries, key=lambda battery: self.calc_dist(house.location, battery.location))
+        return min(possible_batteries, key=lambda battery: self.district.distances[house.id][battery.id])
         
\ No newline at end of file
@@ -5,25 +5,47 @@ The batteries themselves are used as the first 'connectpoints', and the houses g
 after being sorted on their distance from the battery. When a house's path is added, all the pathway points
 are added as connectpoints, and the next house connects to the closest connectpoint. This way, all houses end 
 up connected to their battery. 
+The networks of the batteries never interact, so every battery is searched on its own and the cheapest network
+of every battery is kept. The iterations of a battery are split in chunks with their own random stream, which can
+run in parallel worker processes. An iteration is abandoned as soon as its costs so far plus a lower bound for the
+remaining houses can no longer beat the cheapest network of its chunk.
 """
 
-import copy
 import random
 
 from .algorithm import Algorithm
+from ..classes import Connectpoints
+from ..classes.district import CABLE_COST
 
 ITERATIONS = 3000
+CHUNK_SIZE = 50
+
 
 class RandomSharedGreedy(Algorithm):
     """Connects houses to their battery in a greedy way. The closest house is added directly to the battery, then
     after that the next house is connected to the closest existing 'connectpoint', i.e. the closest existing cable
     or the battery itself when that's closer. 
+    Every battery is searched on its own, in chunks of CHUNK_SIZE iterations. Every chunk draws its random paths
+    from its own stream, seeded by the seed, the battery and the number of the chunk, so a seed gives the same
+    result for any number of processes.
 
     Methods
     ----------
     run()
         Runs the SharedGreedy algorithm
 
+    run_chunk(seed, battery_id, chunk, iterations)
+        Runs a chunk of iterations for a battery and returns the cheapest network
+
+    run_iteration(battery, bound)
+        Lays random cables for the houses of a battery and returns the costs
+
+    init_radii()
+        Calculates the radius of every remaining house location after every step
+
+    calc_remaining_bound(radii, connectpoints)
+        Calculates a lower bound for the cable costs of the remaining houses of a battery
+
     get_nearest_connectpoint(battery, house)
         Gets nearest connectpoint for a house 
 
@@ -34,20 +56,32 @@ class RandomSharedGreedy(Algorithm):
         Initializes the batteries of the district as the first connectpoints
     """
 
-    def __init__(self, district):
+    def __init__(self, district, processes=1, seed=None):
         """Parameters
         ----------
         district : District object
             A district with a prior configuration
+
+        processes : int
+            Number of worker processes, 1 runs all iterations in this process
+
+        seed : int
+            Seed of the random streams, a random seed is drawn when None
         """
 
         self.district = district
+        self.district.shared = True
         self.free_houses = []
         self.iterations = 0
         self.best_total = float('inf')
-        self.best_district = copy.deepcopy(district)
+        self.processes = processes
+        self.seed = seed
+        self.rng = random.Random(seed)
 
-        # connectpoints {BATTERY_ID: [LOCATION, LOCATION, LOCATION]}
+        # radii of the remaining house locations after every step {BATTERY_ID: [{LOCATION: RADIUS}]}
+        self.radii = {}
+
+        # connectpoints {BATTERY_ID: Connectpoints}
         self.connectpoints = self.init_connectpoints()
 
 
@@ -62,53 +96,187 @@ class RandomSharedGreedy(Algorithm):
         # prompt the user for iterations
         iterations = self.prompt_iterations(default=ITERATIONS)
 
+        # sort houses on distance from battery
+        for battery in self.district.batteries:
+            self.district.connections[battery.id].sort( \
+                key=lambda house: self.calc_dist(house.location, battery.location))
+
+        self.radii = self.init_radii()
+
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        tasks = [(seed, battery.id, chunk, min(CHUNK_SIZE, iterations - start)) \
+            for battery in self.district.batteries \
+            for chunk, start in enumerate(range(0, iterations, CHUNK_SIZE))]
+
+        results = self.map_tasks(self.run_chunk, tasks, self.processes)
+
+        # the cheapest network of every battery, on ties the earliest iteration
+        best_results = {}
+        for task, result in zip(tasks, results):
+            battery_id = task[1]
+
+            if battery_id not in best_results or result[:2] < best_results[battery_id][:2]:
+                best_results[battery_id] = result
+
+        # combine the cheapest networks
         self.district.reset_cables()
+        for battery_id, (total, iteration, cables) in best_results.items():
+            self.iterations = max(self.iterations, iteration)
+
+            for house in self.district.connections[battery_id]:
+                self.district.add_cable(house, cables[house.id])
+
+        self.best_total = self.district.calc_cables_costs()["total"]
+
+        return self.district
+
+
+    def run_chunk(self, seed, battery_id, chunk, iterations):
+        """Runs a chunk of iterations for a battery with a random stream of its own.
+
+        Parameters
+        ----------
+        seed : int
+
+        battery_id : int
+
+        chunk : int
+            Number of the chunk
+
+        iterations : int
+            Iterations in the chunk
+
+        Returns
+        ----------
+        tuple
+            Costs, iteration and cables {HOUSE_ID: PATH} of the cheapest network
+        """
+
+        battery = self.district.batteries[battery_id]
+        self.rng = random.Random(f"{seed}-{battery_id}-{chunk}")
+        best = (float('inf'), None, None)
 
         for i in range(iterations):
-            # loop through batteries
-            for battery in self.district.batteries:
+            total = self.run_iteration(battery, bound=best[0])
 
-                houses = self.district.connections[battery.id]
+            if total is not None and total < best[0]:
+                best = (total, chunk * CHUNK_SIZE + i, dict(self.district.cables))
 
-                # sort houses from on distance from battery
-                houses.sort(key=lambda house: self.calc_dist(house.location, battery.location))
+        return best
 
-                # loop through houses
-                for house in houses:
 
-                    # find nearest connectpoint
-                    connectpoint = self.get_nearest_connectpoint(battery, house)   
+    def run_iteration(self, battery, bound=float('inf')):
+        """Lays a random shortest path from every house of a battery to its nearest connectpoint, the houses
+        closest to the battery first. The iteration is abandoned when it can not become cheaper than the bound.
 
-                    # make cable path
-                    path = self.get_random_path(house.location, connectpoint) 
-                    self.district.cables[house.id] = path
+        Parameters
+        ----------
+        battery : Battery object
+
+        bound : int
+            Cable costs to beat
 
-                    # add path to connectpoints
-                    for point in path:
-                        self.connectpoints[battery.id].append(point)
+        Returns
+        ----------
+        int
+            Cable costs of the network, or None if the iteration was abandoned
+        """
+
+        # reset the district cables and the connectpoints of the battery
+        self.district.reset_cables()
+        connectpoints = Connectpoints([battery.location])
+        self.connectpoints[battery.id] = connectpoints
+
+        houses = self.district.connections[battery.id]
+        radii = self.radii[battery.id]
+
+        # loop through houses
+        for index, house in enumerate(houses):
+
+            # find nearest connectpoint
+            connectpoint = self.get_nearest_connectpoint(battery, house)   
+
+            # make cable path
+            path = self.get_random_path(house.location, connectpoint) 
+            self.district.add_cable(house, path)
+
+            # add path to connectpoints
+            connectpoints.add_path(path)
+
+            # only look at the remaining houses when they could reach the bound
+            total = self.district.calc_cables_costs()["cables"]
+            if total + sum(radii[index].values()) * CABLE_COST < bound:
+                continue
+
+            # abandon the iteration when it can no longer beat the bound
+            total += self.calc_remaining_bound(radii[index], connectpoints)
+            if total >= bound:
+                return None
+
+        return self.district.calc_cables_costs()["cables"]
+
+
+    def init_radii(self):
+        """Calculates for every step of every battery the radius of the house locations that remain after
+        that step: half the distance to the nearest other remaining location, rounded down. The squares
+        within these radii around the locations do not overlap.
+
+        Returns
+        ----------
+        dict
+            Radius of every remaining location after every step {BATTERY_ID: [{LOCATION: RADIUS}]}
+        """
+
+        radii = {}
+
+        for battery in self.district.batteries:
+
+            houses = self.district.connections[battery.id]
+            radii[battery.id] = []
+
+            for index in range(len(houses)):
+                locations = set(house.location for house in houses[index + 1:])
+                step_radii = {}
+
+                for location in locations:
+                    dists = [self.calc_dist(location, other) for other in locations if other != location]
+                    step_radii[location] = min(dists, default=float('inf')) // 2
+
+                radii[battery.id].append(step_radii)
+
+        return radii
+
+
+    def calc_remaining_bound(self, radii, connectpoints):
+        """Calculates a lower bound for the cable costs of connecting the remaining house locations to a network.
+        A location needs new edges up to its distance to the network, and the first edges of every location lie
+        within its radius, so they are never shared with another location.
+
+        Parameters
+        ----------
+        radii : dict
+            Radius of every remaining location {LOCATION: RADIUS}
+
+        connectpoints : Connectpoints object
+
+        Returns
+        ----------
+        int
+        """
 
-            res = self.district.calc_cables_costs()
-            total =  res["total"]
+        length = 0
 
-            if total < self.best_total:
-                self.iterations = i
-                self.best_total = total
-                self.best_district = copy.deepcopy(self.district)
+        for location, radius in radii.items():
+            length += min(radius, self.calc_dist(location, connectpoints.nearest(location)))
 
-            
-            # reset the district cables and connectpoints
-            self.district.reset_cables()
-            self.connectpoints = self.init_connectpoints()
-                    
-        return self.best_district
+        return length * CABLE_COST
 
 
     def get_nearest_connectpoint(self, battery, house):
         """Finds the nearest connectpoint for a house to connect to. 
         """
 
-        return min(self.connectpoints[battery.id], key=lambda \
-            location: self.calc_dist(location, house.location))
+        return self.connectpoints[battery.id].nearest(house.location)
 
 
     def get_random_path(self, start_location, end_location):
@@ -155,7 +323,7 @@ class RandomSharedGreedy(Algorithm):
             movements.append((0, ver_move))
 
         # shuffle list of movements
-        random.shuffle(movements)
+        self.rng.shuffle(movements)
 
         # make path
         for movement in movements:
@@ -181,6 +349,6 @@ class RandomSharedGreedy(Algorithm):
 
         for battery in self.district.batteries:
 
-            connectpoints[battery.id] = [battery.location]
+            connectpoints[battery.id] = Connectpoints([battery.location])
 
         return connectpoints
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""RegretInsertion builds a configuration for unique cables in a single pass. Instead of connecting the houses in a
+random order and starting over until the configuration is valid, it connects the house that would lose the most by
+waiting first: the house with the largest difference in costs between its cheapest and its next cheapest battery
+that still have capacity left. Since the batteries have little capacity to spare, the last houses may not fit
+anywhere, and a repair step then moves houses between batteries until no battery is overloaded.
+"""
+
+import random
+
+import numpy
+
+from .algorithm import Algorithm
+from ..classes.district_arrays import FREE
+
+# overload that counts as within capacity, for rounding of the outputs
+EPSILON = 1e-6
+
+class RegretInsertion(Algorithm):
+    """Connects the free houses of a district one at a time. Every step the regret of every free house is the
+    difference in costs between its cheapest battery with capacity left and the next regret - 1 cheapest ones. A
+    house with fewer batteries left than that has an infinite regret and goes first. On equal regret the house
+    with the highest output goes first, like first fit decreasing bin packing, and a house goes to the fullest of
+    its equally cheap batteries. When no battery has capacity left for a house, a connected house is moved to
+    another battery to make room, or if no move does, the house goes to the battery with the most capacity left.
+    The overload is then removed by shifting and swapping houses. Without noise the result is deterministic, with
+    noise the regrets are multiplied by a random factor, so every seed gives another configuration.
+
+    Methods
+    ----------
+    run()
+        Runs the RegretInsertion algorithm
+
+    calc_regret(house_id, usage)
+        Calculates the regret of a free house and its cheapest battery
+
+    make_room(house_id, assignment, usage)
+        Moves a connected house to another battery so that a free house fits
+
+    repair(assignment, usage)
+        Shifts and swaps houses until no battery is overloaded
+
+    calc_overload(usage, battery_ids, changes)
+        Calculates how much the overload of batteries changes
+    """
+
+    def __init__(self, district, regret=2, noise=0, seed=None):
+        """Parameters
+        ----------
+        district : District object
+
+        regret : int
+            Number of cheapest batteries that are compared for the regret
+
+        noise : float
+            Maximum fraction by which the regrets are randomly raised or lowered
+
+        seed : int
+        """
+
+        self.district = district
+        self.iterations = 0
+        self.regret = regret
+        self.noise = noise
+        self.rng = random.Random(seed)
+
+        self.outputs = district.arrays.outputs.tolist()
+        self.capacities = district.arrays.capacities.tolist()
+
+
+    def run(self):
+        """Runs the RegretInsertion algorithm
+
+        Returns
+        ----------
+        District object
+            District with every house connected
+        """
+
+        assignment = self.district.get_assignment()
+        usage = self.district.arrays.calc_usage(assignment).tolist()
+        assignment = assignment.tolist()
+        free_houses = [house_id for house_id, battery_id in enumerate(assignment) if battery_id == FREE]
+
+        while free_houses:
+            self.iterations += 1
+
+            best = None
+            for index, house_id in enumerate(free_houses):
+                regret, battery_id = self.calc_regret(house_id, usage)
+
+                if self.noise and regret != float('inf'):
+                    regret *= 1 + self.noise * (2 * self.rng.random() - 1)
+
+                # higher regret first, higher output on equal regret
+                key = (regret, self.outputs[house_id])
+                if best is None or key > best[0]:
+                    best = (key, index, battery_id)
+
+            key, index, battery_id = best
+            house_id = free_houses.pop(index)
+
+            if battery_id is None:
+                battery_id = self.make_room(house_id, assignment, usage)
+
+            assignment[house_id] = battery_id
+            usage[battery_id] += self.outputs[house_id]
+
+        assignment = self.repair(numpy.array(assignment), numpy.array(usage))
+        self.district.set_assignment(assignment)
+
+        # set district cables
+        self.set_district_cables(self.district)
+
+        return self.district
+
+
+    def calc_regret(self, house_id, usage):
+        """Calculates the regret of a free house: how much more its next cheapest batteries with capacity left
+        cost than its cheapest one, summed over the regret number of batteries.
+
+        Parameters
+        ----------
+        house_id : int
+
+        usage : list
+
+        Returns
+        ----------
+        tuple
+            Regret and ID of the cheapest battery, or None as battery if no battery has capacity left
+        """
+
+        costs = self.district.costs[house_id]
+        output = self.outputs[house_id]
+
+        # cheapest first, the fullest battery on equal costs
+        batteries = sorted((battery_id for battery_id in range(len(usage)) \
+            if usage[battery_id] + output <= self.capacities[battery_id]), \
+            key=lambda battery_id: (costs[battery_id], self.capacities[battery_id] - usage[battery_id]))
+
+        if not batteries:
+            return float('inf'), None
+
+        if len(batteries) < self.regret:
+            return float('inf'), batteries[0]
+
+        regret = sum(costs[battery_id] - costs[batteries[0]] for battery_id in batteries[1:self.regret])
+
+        return regret, batteries[0]
+
+
+    def make_room(self, house_id, assignment, usage):
+        """Moves the connected house for which it is cheapest to another battery with capacity left, so that
+        a free house fits in its old battery.
+
+        Parameters
+        ----------
+        house_id : int
+
+        assignment : list
+
+        usage : list
+
+        Returns
+        ----------
+        int
+            ID of the battery that has room for the free house, or with the most capacity left if no move
+            makes room
+        """
+
+        costs = self.district.costs
+        output = self.outputs[house_id]
+        best = None
+
+        for moved_id, battery_id in enumerate(assignment):
+
+            if battery_id == FREE or usage[battery_id] - self.outputs[moved_id] + output > self.capacities[battery_id]:
+                continue
+
+            for new_battery_id in range(len(usage)):
+
+                if new_battery_id == battery_id \
+                    or usage[new_battery_id] + self.outputs[moved_id] > self.capacities[new_battery_id]:
+                    continue
+
+                delta = costs[house_id][battery_id] + costs[moved_id][new_battery_id] - costs[moved_id][battery_id]
+
+                if best is None or delta < best[0]:
+                    best = (delta, moved_id, battery_id, new_battery_id)
+
+        if best is None:
+            return max(range(len(usage)), key=lambda battery_id: self.capacities[battery_id] - usage[battery_id])
+
+        delta, moved_id, battery_id, new_battery_id = best
+        assignment[moved_id] = new_battery_id
+        usage[battery_id] -= self.outputs[moved_id]
+        usage[new_battery_id] += self.outputs[moved_id]
+
+        return battery_id
+
+
+    def repair(self, assignment, usage):
+        """Removes the overload of the batteries. Every step applies the shift of a house of an overloaded
+        battery, or its swap with a house of another battery, that lowers the total overload most, the cheapest
+        one on equal overload.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        usage : numpy.ndarray
+
+        Returns
+        ----------
+        numpy.ndarray
+
+        Raises
+        ----------
+        ValueError
+            If no move lowers the overload
+        """
+
+        arrays = self.district.arrays
+        outputs = arrays.outputs
+        houses = numpy.arange(len(assignment))
+        batteries = numpy.arange(len(usage))
+
+        while (usage > arrays.capacities + EPSILON).any():
+            self.iterations += 1
+
+            battery_id = int(numpy.argmax(usage - arrays.capacities))
+            moved = numpy.nonzero(assignment == battery_id)[0]
+            costs = arrays.costs[houses, assignment]
+
+            # shift a house of the overloaded battery to another battery (moved x batteries)
+            shift_overload = self.calc_overload(usage, battery_id, -outputs[moved][:, None]) \
+                + self.calc_overload(usage, batteries[None, :], outputs[moved][:, None])
+            shift_costs = arrays.costs[moved] - costs[moved][:, None]
+            shift_overload[:, battery_id] = 0
+
+            # swap a house of the overloaded battery with a house of another battery (moved x houses)
+            changes = outputs[None, :] - outputs[moved][:, None]
+            swap_overload = self.calc_overload(usage, battery_id, changes) \
+                + self.calc_overload(usage, assignment[None, :], -changes)
+            swap_costs = arrays.costs[moved][:, assignment] + arrays.costs[:, battery_id][None, :] \
+                - costs[moved][:, None] - costs[None, :]
+            swap_overload[:, assignment == battery_id] = 0
+
+            # lowest overload first, then lowest costs
+            shift_index = numpy.unravel_index(numpy.lexsort((shift_costs.ravel(), \
+                shift_overload.ravel()))[0], shift_overload.shape)
+            swap_index = numpy.unravel_index(numpy.lexsort((swap_costs.ravel(), \
+                swap_overload.ravel()))[0], swap_overload.shape)
+
+            shift = (shift_overload[shift_index], shift_costs[shift_index])
+            swap = (swap_overload[swap_index], swap_costs[swap_index])
+
+            if min(shift, swap)[0] >= -EPSILON:
+                raise ValueError("no shift or swap lowers the overload of the batteries")
+
+            if shift <= swap:
+                house_id, new_battery_id = moved[shift_index[0]], shift_index[1]
+            else:
+                house_id, swap_id = moved[swap_index[0]], swap_index[1]
+                new_battery_id = assignment[swap_id]
+                assignment[swap_id] = battery_id
+                usage[battery_id] += outputs[swap_id]
+                usage[new_battery_id] -= outputs[swap_id]
+
+            assignment[house_id] = new_battery_id
+            usage[battery_id] -= outputs[house_id]
+            usage[new_battery_id] += outputs[house_id]
+
+        return assignment
+
+
+    def calc_overload(self, usage, battery_ids, changes):
+        """Calculates how much the output above capacity of batteries changes when their usage changes.
+
+        Parameters
+        ----------
+        usage : numpy.ndarray
+
+        battery_ids : int or numpy.ndarray
+
+        changes : numpy.ndarray
+            Change in usage
+
+        Returns
+        ----------
+        numpy.ndarray
+        """
+
+        capacities = self.district.arrays.capacities[battery_ids]
+        current = usage[battery_ids]
+
+        return numpy.maximum(current + changes - capacities, 0) - numpy.maximum(current - capacities, 0)
@@ -0,0 +1,458 @@
+"""SharedAnnealing improves a district with shared cables by changing the assignment and the cables together. It
+moves houses to another battery, reroutes their cables or flips the L-shape of their cables, and costs every move by
+the grid edges it adds to and frees from the shared networks. Moves that raise the costs are accepted with a
+probability that decreases as the temperature cools down over a time limit, and the cheapest district found so far
+is returned when the time is up.
+"""
+
+import math
+import random
+import time
+
+from .algorithm import Algorithm
+from .sharedgreedy import SharedGreedy
+from ..classes.district import CABLE_COST, get_edges
+
+# default seconds to run when the user is prompted
+TIME_LIMIT = 10
+START_TEMPERATURE = 10
+END_TEMPERATURE = 1
+MOVES = ('reassign', 'reroute', 'flip')
+
+# extra distance a rerouted cable may run to reach a point of the network
+REROUTE_SLACK = 1
+
+# moves between checks of the clock
+CHECK_INTERVAL = 100
+
+class SharedAnnealing(Algorithm):
+    """Simulated annealing on the assignment and the cables of a shared district. Only the cables of leaf houses
+    are changed: houses that no other cable is connected to, besides at the end of their own cable. Removing such a
+    cable never disconnects another house. For every battery network the algorithm counts how many cables use every
+    point, and how many cables end at every point, so leaf houses and the connectpoints without a house's own cable
+    are found without rebuilding the network.
+
+    Methods
+    ----------
+    run()
+        Runs the SharedAnnealing algorithm
+
+    init_networks()
+        Counts the points and cable ends of every battery network
+
+    is_leaf(house)
+        Checks if no other cable is connected to the cable of a house
+
+    get_reassign_move(house)
+        Creates a move of a house to another battery with capacity left
+
+    get_reroute_move(house)
+        Creates a new cable for a house to its battery network
+
+    get_flip_move(house)
+        Creates a move that flips the L-shape of a house's cable
+
+    get_connectpoint(battery_id, house, slack)
+        Finds a near point of a network, without the cable of the house
+
+    calc_delta(house, battery_id, path)
+        Calculates how much the cable costs change with a move
+
+    apply_move(house, battery_id, path)
+        Connects a house to a battery with a new cable
+
+    get_random_path(start_location, end_location)
+        Creates a shortest Manhattan path between two points in a random x,y order
+
+    get_temperature(progress)
+        Returns the temperature at a fraction of the time limit
+    """
+
+    def __init__(self, district, time_limit=None, start_temperature=START_TEMPERATURE, \
+        end_temperature=END_TEMPERATURE, seed=None):
+        """Parameters
+        ----------
+        district : District object
+            A district with a prior configuration, with or without shared cables
+
+        time_limit : float
+            Seconds to run, None to prompt the user like the iterations of the other algorithms
+
+        start_temperature, end_temperature : float
+            Temperature at the start and at the end of the time limit
+
+        seed : int
+        """
+
+        self.district = district
+        self.district.shared = True
+        self.iterations = 0
+        self.time_limit = time_limit
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.rng = random.Random(seed)
+        self.best_total = float('inf')
+
+        # number of cables on every point {BATTERY_ID: {POINT: COUNT}}
+        self.points = {}
+
+        # number of cables that end at every point {BATTERY_ID: {POINT: COUNT}}
+        self.anchors = {}
+
+
+    def run(self):
+        """Runs the SharedAnnealing algorithm
+
+        Returns
+        ----------
+        District object
+        """
+
+        houses = [house for house in self.district.houses if house.id in self.district.house_battery]
+
+        # lay cables first when the district has none
+        if any(house.id not in self.district.cables for house in houses):
+            SharedGreedy(self.district, seed=self.rng.randrange(2 ** 32)).run()
+
+        self.init_networks()
+
+        total = self.district.calc_cables_costs()["total"]
+        self.best_total = total
+        best_solution = self.district.snapshot()
+
+        # prompt the user for the seconds to run
+        time_limit = self.time_limit
+        if time_limit is None:
+            time_limit = self.prompt_iterations(default=TIME_LIMIT, name='seconds to run')
+
+        start = time.perf_counter()
+        temperature = self.start_temperature
+
+        while True:
+
+            # cool down with the time spent
+            if self.iterations % CHECK_INTERVAL == 0:
+                progress = (time.perf_counter() - start) / time_limit
+                if progress >= 1:
+                    break
+                temperature = self.get_temperature(progress)
+
+            self.iterations += 1
+            house = self.rng.choice(houses)
+
+            if not self.is_leaf(house):
+                continue
+
+            move = getattr(self, 'get_' + self.rng.choice(MOVES) + '_move')(house)
+
+            if move is None:
+                continue
+
+            battery_id, path = move
+            delta = self.calc_delta(house, battery_id, path)
+
+            if delta > 0 and self.rng.random() >= math.exp(-delta / temperature):
+                continue
+
+            self.apply_move(house, battery_id, path)
+            total += delta
+
+            if total < self.best_total:
+                self.best_total = total
+                best_solution = self.district.snapshot()
+
+        # restore the cheapest district found
+        self.district.restore(best_solution)
+
+        return self.district
+
+
+    def init_networks(self):
+        """Counts for every battery network how many cables use every point and how many cables end at
+        every point. The battery itself counts as one cable on its location.
+        """
+
+        self.points = {}
+        self.anchors = {}
+
+        for battery in self.district.batteries:
+            self.points[battery.id] = {battery.location: 1}
+            self.anchors[battery.id] = {}
+
+        for house_id, path in self.district.cables.items():
+            battery_id = self.district.house_battery[house_id]
+            points = self.points[battery_id]
+
+            for point in path:
+                points[point] = points.get(point, 0) + 1
+
+            anchors = self.anchors[battery_id]
+            anchors[path[-1]] = anchors.get(path[-1], 0) + 1
+
+
+    def is_leaf(self, house):
+        """Checks if no other cable ends on the cable of a house, besides at the end of the cable.
+
+        Parameters
+        ----------
+        house : House object
+
+        Returns
+        ----------
+        bool
+        """
+
+        anchors = self.anchors[self.district.house_battery[house.id]]
+
+        for point in self.district.cables[house.id][:-1]:
+            if point in anchors:
+                return False
+
+        return True
+
+
+    def get_reassign_move(self, house):
+        """Creates a move of a house to a random other battery that has capacity left, with a random shortest
+        cable to the nearest point of its network.
+
+        Parameters
+        ----------
+        house : House object
+
+        Returns
+        ----------
+        tuple
+            Battery ID and cable path, or None if the battery has no capacity left
+        """
+
+        battery_id = self.district.house_battery[house.id]
+        batteries = [battery for battery in self.district.batteries if battery.id != battery_id]
+        battery = self.rng.choice(batteries)
+
+        if self.district.usage[battery.id] + house.output > battery.capacity:
+            return None
+
+        connectpoint = self.get_connectpoint(battery.id, house)
+
+        return battery.id, self.get_random_path(house.location, connectpoint)
+
+
+    def get_reroute_move(self, house):
+        """Creates a new random shortest cable from a house to a random point of its network without its own
+        cable, at most REROUTE_SLACK further than the nearest point. The cable may then run along the network
+        for free before it ends.
+
+        Parameters
+        ----------
+        house : House object
+
+        Returns
+        ----------
+        tuple
+            Battery ID and cable path
+        """
+
+        battery_id = self.district.house_battery[house.id]
+        connectpoint = self.get_connectpoint(battery_id, house, slack=REROUTE_SLACK)
+
+        return battery_id, self.get_random_path(house.location, connectpoint)
+
+
+    def get_flip_move(self, house):
+        """Creates a move that lays the cable of a house as the other L-shape between the same end points.
+
+        Parameters
+        ----------
+        house : House object
+
+        Returns
+        ----------
+        tuple
+            Battery ID and cable path, or None if the cable is straight
+        """
+
+        path = self.district.cables[house.id]
+        start_location = path[0]
+        end_location = path[-1]
+
+        if start_location[0] == end_location[0] or start_location[1] == end_location[1]:
+            return None
+
+        # horizontal first from the start, or vertical first
+        horizontal = self.get_path(start_location, end_location)
+        vertical = self.get_path(end_location, start_location)
+        vertical.reverse()
+
+        if path == horizontal:
+            new_path = vertical
+        elif path == vertical:
+            new_path = horizontal
+        else:
+            new_path = self.rng.choice([horizontal, vertical])
+
+        return self.district.house_battery[house.id], new_path
+
+
+    def get_connectpoint(self, battery_id, house, slack=0):
+        """Finds a point of a battery network near a house, leaving out points that are only on the house's
+        own cable. Without slack this is the nearest point, otherwise a random point at most slack further
+        than the nearest point.
+
+        Parameters
+        ----------
+        battery_id : int
+
+        house : House object
+
+        slack : int
+
+        Returns
+        ----------
+        tuple
+        """
+
+        own_points = set()
+        if self.district.house_battery[house.id] == battery_id:
+            own_points = set(self.district.cables[house.id])
+
+        dists = {}
+
+        for point, count in self.points[battery_id].items():
+
+            if count == 1 and point in own_points:
+                continue
+
+            dists[point] = self.calc_dist(point, house.location)
+
+        max_dist = min(dists.values()) + slack
+        candidates = [point for point, dist in dists.items() if dist <= max_dist]
+
+        return self.rng.choice(candidates)
+
+
+    def calc_delta(self, house, battery_id, path):
+        """Calculates how much the shared cable costs change when the cable of a house is replaced by a path
+        in the network of a battery, without modifying the district.
+
+        Parameters
+        ----------
+        house : House object
+
+        battery_id : int
+
+        path : list
+
+        Returns
+        ----------
+        int
+        """
+
+        current_id = self.district.house_battery[house.id]
+        current_edges = get_edges(self.district.cables[house.id])
+        edges = self.district.edges[current_id]
+
+        # edges only used by the current cable are freed
+        freed = sum(1 for edge in current_edges if edges[edge] == 1)
+
+        own_edges = set(current_edges) if battery_id == current_id else set()
+        edges = self.district.edges[battery_id]
+
+        # edges that no other cable uses are added
+        added = sum(1 for edge in get_edges(path) if edges.get(edge, 0) - (edge in own_edges) == 0)
+
+        return (added - freed) * CABLE_COST
+
+
+    def apply_move(self, house, battery_id, path):
+        """Replaces the cable of a house by a path in the network of a battery, and moves the house to that
+        battery if it is another one.
+
+        Parameters
+        ----------
+        house : House object
+
+        battery_id : int
+
+        path : list
+        """
+
+        current_id = self.district.house_battery[house.id]
+        current_path = self.district.cables[house.id]
+
+        # remove the current cable from the counts
+        points = self.points[current_id]
+        for point in current_path:
+            points[point] -= 1
+            if points[point] == 0:
+                del points[point]
+
+        anchors = self.anchors[current_id]
+        anchors[current_path[-1]] -= 1
+        if anchors[current_path[-1]] == 0:
+            del anchors[current_path[-1]]
+
+        self.district.remove_cable(house)
+
+        if battery_id != current_id:
+            self.district.remove_connection(self.district.batteries[current_id], house)
+            self.district.add_connection(self.district.batteries[battery_id], house)
+
+        self.district.add_cable(house, path)
+
+        # add the new cable to the counts
+        points = self.points[battery_id]
+        for point in path:
+            points[point] = points.get(point, 0) + 1
+
+        anchors = self.anchors[battery_id]
+        anchors[path[-1]] = anchors.get(path[-1], 0) + 1
+
+
+    def get_random_path(self, start_location, end_location):
+        """Creates a shortest Manhattan path between two locations with the x- and y-movements in a
+        random order.
+
+        Parameters
+        ----------
+        start_location : tuple
+
+        end_location : tuple
+
+        Returns
+        ----------
+        list
+        """
+
+        current_x, current_y = start_location
+        end_x, end_y = end_location
+
+        # shuffle the movements
+        hor_move = 1 if end_x > current_x else -1
+        ver_move = 1 if end_y > current_y else -1
+        movements = [(hor_move, 0)] * abs(end_x - current_x) + [(0, ver_move)] * abs(end_y - current_y)
+        self.rng.shuffle(movements)
+
+        path = [(current_x, current_y)]
+
+        for move_x, move_y in movements:
+            current_x += move_x
+            current_y += move_y
+            path.append((current_x, current_y))
+
+        return path
+
+
+    def get_temperature(self, progress):
+        """Returns the temperature after a fraction of the time limit, cooling geometrically.
+
+        Parameters
+        ----------
+        progress : float
+            Fraction of the time limit that is spent
+
+        Returns
+        ----------
+        float
+        """
+
+        return self.start_temperature * (self.end_temperature / self.start_temperature) ** progress
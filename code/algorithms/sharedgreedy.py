@@ -1,9 +1,11 @@
 """The SharedGreedy algorithm uses a configuration that has already been formed for a district, and 
 places cables in a greedy manner. 
-The batteries themselves are used as the first 'connectpoints', and the houses get a cable to them one by one
-after being sorted on their distance from the battery. When a house's path is added, all the pathway points
-are added as connectpoints, and the next house connects to the closest connectpoint. This way, all houses end 
-up connected to their battery. 
+The batteries themselves are used as the first 'connectpoints', and the houses get a cable to them one by one.
+Every step the house that is closest to the network of its battery is connected to its closest connectpoint. 
+When a house's path is added, all the pathway points are added as connectpoints. This way, all houses end 
+up connected to their battery. The networks of the batteries never interact, so they can be built in parallel.
+Every battery draws its random paths from its own stream, so a seed gives the same cables for any number of
+processes.
 """
 
 import copy
@@ -12,40 +14,57 @@ import matplotlib.pyplot as plt
 import numpy
 
 from .algorithm import Algorithm
+from ..classes import DistanceField
 
 class SharedGreedy(Algorithm):
     """Connects houses to their battery in a greedy way. The closest house is added directly to the battery, then
-    after that the next house is connected to the closest existing 'connectpoint', i.e. the closest existing cable
-    or the battery itself when that's closer. 
+    after that the house closest to the network is connected to its closest existing 'connectpoint', i.e. the closest 
+    existing cable or the battery itself when that's closer. The distance of every grid point to the network of 
+    a battery is kept in a distance field, so the distances of all remaining houses are read at once.
 
     Methods
     ----------
     run()
         Runs the SharedGreedy algorithm
 
+    connect_houses(seed, battery_id)
+        Builds the cables of the houses of a battery, closest to the network first
+
     get_nearest_connectpoint(battery, house)
         Gets nearest connectpoint for a house 
 
     get_random_path(start_location, end_location)
         Creates a shortest Manhattan path between two points in a random x,y order
 
-    init_connectpoints()
+    init_fields()
         Initializes the batteries of the district as the first connectpoints
 
     plot_cables(district)
         Plots the conplete district with its paths
     """
 
-    def __init__(self, district):
+    def __init__(self, district, processes=1, seed=None):
         """Parameters
         ----------
         district : District object
             A district with a prior configuration
+
+        processes : int
+            Number of worker processes that build networks, 1 builds them in this process
+
+        seed : int
+            Seed of the random streams, a random seed is drawn when None
         """
         self.district = district
+        self.district.shared = True
         self.free_houses = []
         self.iterations = 0
-        self.connectpoints = self.init_connectpoints()
+        self.processes = processes
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # distance fields {BATTERY_ID: DistanceField}
+        self.fields = {}
 
 
     def run(self):
@@ -57,38 +76,77 @@ class SharedGreedy(Algorithm):
         """
 
         self.district.reset_cables()
+        self.fields = self.init_fields()
 
-        # loop through batteries
-        for battery in self.district.batteries:
+        # build the network of every battery
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        tasks = [(seed, battery.id) for battery in self.district.batteries]
+        networks = self.map_tasks(self.connect_houses, tasks, self.processes)
 
-            houses = self.district.connections[battery.id]
+        for battery, cables in zip(self.district.batteries, networks):
+            for house in self.district.connections[battery.id]:
+                self.district.add_cable(house, cables[house.id])
 
-            # sort houses from on distance from battery
-            houses.sort(key=lambda house: self.calc_dist(house.location, battery.location))
+        return self.district
 
-            # loop through houses
-            for house in houses:
 
-                # find nearest connectpoint
-                connectpoint = self.get_nearest_connectpoint(battery, house)   
+    def connect_houses(self, seed, battery_id):
+        """Builds the cables of the houses of a battery one by one. Every step the house that is closest to
+        the network is connected, houses closer to the battery first when they are equally close. The district
+        itself is not changed. The paths are drawn from a random stream of the battery.
 
-                # make cable path
-                path = self.get_random_path(house.location, connectpoint) 
-                self.district.cables[house.id] = path
+        Parameters
+        ----------
+        seed : int
 
-                # add path to connectpoints
-                for point in path:
-                    self.connectpoints[battery.id].append(point)  
+        battery_id : int
 
-        return self.district
+        Returns
+        ----------
+        dict
+            Cable path of every house of the battery {HOUSE_ID: PATH}
+        """
+
+        battery = self.district.batteries[battery_id]
+        self.rng = random.Random(f"{seed}-{battery_id}")
+        cables = {}
+
+        # sort houses from on distance from battery
+        houses = sorted(self.district.connections[battery.id], \
+            key=lambda house: self.district.distances[house.id][battery.id])
+
+        remaining = numpy.arange(len(houses))
+        house_x = numpy.array([house.location[0] for house in houses], dtype=int)
+        house_y = numpy.array([house.location[1] for house in houses], dtype=int)
+
+        field = self.fields[battery.id]
+
+        while len(remaining) > 0:
+
+            # find house closest to the network
+            dists = field.get_distances(house_x[remaining], house_y[remaining])
+            index = int(numpy.argmin(dists))
+            house = houses[remaining[index]]
+            remaining = numpy.delete(remaining, index)
+
+            # find nearest connectpoint
+            connectpoint = self.get_nearest_connectpoint(battery, house)
+
+            # make cable path
+            path = self.get_random_path(house.location, connectpoint) 
+            cables[house.id] = path
+
+            # add path to connectpoints
+            field.add_points(path)
+
+        return cables
 
 
     def get_nearest_connectpoint(self, battery, house):
         """Finds the nearest connectpoint for a house to connect to. 
         """
 
-        return min(self.connectpoints[battery.id], key=lambda \
-            location: self.calc_dist(location, house.location))
+        return self.fields[battery.id].get_nearest(house.location)
 
 
     def get_random_path(self, start_location, end_location):
@@ -135,7 +193,7 @@ class SharedGreedy(Algorithm):
             movements.append((0, ver_move))
 
         # shuffle list of movements
-        random.shuffle(movements)
+        self.rng.shuffle(movements)
 
         # make path
         for movement in movements:
@@ -153,14 +211,16 @@ class SharedGreedy(Algorithm):
         return path 
 
 
-    def init_connectpoints(self):
+    def init_fields(self):
         """Initializes the batteries in a district as the first connectpoints. 
         """
 
-        connectpoints = {}
+        fields = {}
+        width = self.district.arrays.width
+        height = self.district.arrays.height
 
         for battery in self.district.batteries:
 
-            connectpoints[battery.id] = [battery.location]
+            fields[battery.id] = DistanceField(width, height, [battery.location])
 
-        return connectpoints
\ No newline at end of file
+        return fields
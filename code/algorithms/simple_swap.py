@@ -1,11 +1,15 @@
 """SimpleSwap repeatedly loops through the houses in a (for example randomly) configurated ditrict, starting at the house with
 the longest connection, and searches for a house with similar output. If the swapping of the connections between these houses 
 results in lower costs, the houses are swapped regarding their batteries. 
+In matrix mode the gain and feasibility of every possible swap are calculated at once with NumPy, and every pass 
+applies a batch of the best improving swaps. 
 """
 
 import copy
+import numpy
 
 from .algorithm import Algorithm
+from ..classes.district_arrays import FREE
 
 class SimpleSwap(Algorithm):
     """Optimizing a district by swapping longest cables with a better alternative. A house with a relatively long cable
@@ -24,20 +28,36 @@ class SimpleSwap(Algorithm):
 
     swap(current_connection, swap_connection)
         Swaps two houses with respect to the batteries they're connected to. 
+
+    run_matrix()
+        Runs the algorithm with a matrix of all swap gains.
+
+    calc_gains(assignment, rows)
+        Calculates the gain of swapping houses with all other houses.
+
+    calc_feasible(assignment, usage)
+        Calculates which swaps stay within battery capacity.
     """
 
-    def __init__(self, district):
+    def __init__(self, district, matrix=False):
         """Parameters
         ----------
         district : District object
+
+        matrix : bool
+            Whether to evaluate all swaps at once with a gain matrix
         """
         self.district = district
         self.iterations = 0
+        self.matrix = matrix
 
     
     def run(self):
         """Runs the SimpleSwap algorithm.
         """
+        if self.matrix:
+            return self.run_matrix()
+
         # sort connections based on length
         sorted_connections = self.sort_connections()
         
@@ -77,7 +97,7 @@ class SimpleSwap(Algorithm):
             for house in houses:
                 connection_list.append([battery, house])
 
-        connection_list.sort(key=lambda connection: self.calc_dist(connection[1].location, connection[0].location), reverse=True)
+        connection_list.sort(key=lambda connection: self.district.distances[connection[1].id][connection[0].id], reverse=True)
 
         return connection_list
 
@@ -95,7 +115,8 @@ class SimpleSwap(Algorithm):
         """
 
         current_battery, current_house = connection
-        current_dist = self.calc_dist(current_house.location, current_battery.location)
+        distances = self.district.distances
+        current_dist = distances[current_house.id][current_battery.id]
 
         # capacity left in the battery
         remaining_capacity = current_battery.capacity - (self.district.get_usage(current_battery) - current_house.output)
@@ -115,8 +136,8 @@ class SimpleSwap(Algorithm):
                 continue
         
             # check if the swap would lead to less cables 
-            current_total_dist = current_dist + self.calc_dist(new_house.location, new_battery.location)
-            new_total_dist = self.calc_dist(current_house.location, new_battery.location) + self.calc_dist(new_house.location, current_battery.location)
+            current_total_dist = current_dist + distances[new_house.id][new_battery.id]
+            new_total_dist = distances[current_house.id][new_battery.id] + distances[new_house.id][current_battery.id]
 
             # check if it's the best swapping option
             if (new_total_dist < current_total_dist) and (new_total_dist < best_length):
@@ -141,9 +162,126 @@ class SimpleSwap(Algorithm):
         swap_battery, swap_house = swap_connection
 
         # remove current connections
-        self.district.connections[current_battery.id].remove(current_house)
-        self.district.connections[swap_battery.id].remove(swap_house)
+        self.district.remove_connection(current_battery, current_house)
+        self.district.remove_connection(swap_battery, swap_house)
 
         # make new connections
-        self.district.connections[current_battery.id].append(swap_house)
-        self.district.connections[swap_battery.id].append(current_house)
\ No newline at end of file
+        self.district.add_connection(current_battery, swap_house)
+        self.district.add_connection(swap_battery, current_house)
+
+
+    def run_matrix(self):
+        """Runs the SimpleSwap algorithm with a matrix of the gains of all swaps. Every pass, the improving swaps 
+        that stay within capacity are applied from best to worst, skipping houses that were already swapped in the 
+        pass and swaps that no longer fit. Afterwards only the rows and columns of the swapped houses are updated.
+        """
+
+        arrays = self.district.arrays
+        houses = {house.id: house for house in self.district.houses}
+        assignment = self.district.get_assignment()
+        usage = arrays.calc_usage(assignment)
+
+        gains = self.calc_gains(assignment, numpy.arange(len(assignment)))
+
+        while True:
+            self.iterations += 1
+
+            # improving swaps that fit, each pair once
+            feasible = self.calc_feasible(assignment, usage)
+            candidates = numpy.triu((gains > 0) & feasible, k=1)
+            house_ids, swap_ids = numpy.nonzero(candidates)
+
+            if len(house_ids) == 0:
+                break
+
+            order = numpy.argsort(-gains[house_ids, swap_ids], kind="stable")
+            swapped = set()
+
+            for house_id, swap_id in zip(house_ids[order].tolist(), swap_ids[order].tolist()):
+
+                if house_id in swapped or swap_id in swapped:
+                    continue
+
+                battery_id = assignment[house_id]
+                swap_battery_id = assignment[swap_id]
+                output_change = arrays.outputs[swap_id] - arrays.outputs[house_id]
+
+                # check capacity with the swaps of this pass
+                if usage[battery_id] + output_change > arrays.capacities[battery_id] or \
+                    usage[swap_battery_id] - output_change > arrays.capacities[swap_battery_id]:
+                    continue
+
+                self.swap([self.district.batteries[battery_id], houses[house_id]], \
+                    [self.district.batteries[swap_battery_id], houses[swap_id]])
+
+                assignment[house_id], assignment[swap_id] = swap_battery_id, battery_id
+                usage[battery_id] += output_change
+                usage[swap_battery_id] -= output_change
+                swapped.update((house_id, swap_id))
+
+            # update the gains of the swapped houses
+            rows = numpy.array(sorted(swapped))
+            row_gains = self.calc_gains(assignment, rows)
+            gains[rows, :] = row_gains
+            gains[:, rows] = row_gains.T
+
+        # set district cables
+        self.set_district_cables(self.district)
+        return self.district
+
+
+    def calc_gains(self, assignment, rows):
+        """Calculates how much shorter the cables become when houses are swapped with every other house. Swaps 
+        with free houses or within the same battery have no gain.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        rows : numpy.ndarray
+            IDs of the houses to calculate the gains for
+
+        Returns
+        ----------
+        numpy.ndarray
+            Gains with a row for every house in rows and a column for every house
+        """
+
+        distances = self.district.arrays.distances
+        batteries = numpy.maximum(assignment, 0)
+        current = distances[numpy.arange(len(assignment)), batteries]
+
+        # distance of the houses in rows to the battery of every house, and of every house to theirs
+        swapped = distances[rows][:, batteries] + distances[:, batteries[rows]].T
+        gains = current[rows][:, None] + current[None, :] - swapped
+
+        connected = assignment != FREE
+        gains[~connected[rows], :] = 0
+        gains[:, ~connected] = 0
+        gains[assignment[rows][:, None] == assignment[None, :]] = 0
+
+        return gains
+
+
+    def calc_feasible(self, assignment, usage):
+        """Calculates which swaps keep both batteries within capacity, given the current usage.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        usage : numpy.ndarray
+
+        Returns
+        ----------
+        numpy.ndarray
+            Boolean matrix with a row and a column for every house
+        """
+
+        arrays = self.district.arrays
+        batteries = numpy.maximum(assignment, 0)
+
+        # capacity left in the battery of every house without that house
+        remaining = arrays.capacities[batteries] - usage[batteries] + arrays.outputs
+
+        return (arrays.outputs[None, :] <= remaining[:, None]) & (arrays.outputs[:, None] <= remaining[None, :])
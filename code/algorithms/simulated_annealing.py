@@ -0,0 +1,271 @@
+"""SimulatedAnnealing improves a district with unique cables by randomly shifting houses to other batteries and
+swapping houses between batteries. Moves that raise the costs are accepted with a probability that decreases as
+the temperature cools down, so the search can escape local optima. The temperature follows a cooling schedule
+over a time budget.
+"""
+
+import math
+import random
+import time
+
+import numpy
+
+from .algorithm import Algorithm
+from ..classes.district_arrays import FREE
+
+# default seconds to run when the user is prompted
+TIME_LIMIT = 10
+START_TEMPERATURE = 100
+END_TEMPERATURE = 1
+SWAP_PROBABILITY = 0.5
+SCHEDULES = ('geometric', 'linear')
+
+# moves between checks of the clock
+CHECK_INTERVAL = 1000
+
+# overload that counts as within capacity, for rounding of the outputs
+EPSILON = 1e-6
+
+class SimulatedAnnealing(Algorithm):
+    """Simulated annealing on the assignment of houses to batteries. The costs, outputs, capacities and usage are
+    kept in plain lists, so the change in costs of a shift or swap is a few lookups. Without a penalty, moves that
+    overload a battery further are rejected. With a penalty, every unit of output above capacity adds the penalty
+    to the costs, and the search may pass through overloaded configurations. Only configurations within capacity
+    are kept as the best solution.
+
+    Methods
+    ----------
+    run()
+        Runs the SimulatedAnnealing algorithm
+
+    init_assignment()
+        Returns the current assignment with every free house connected
+
+    get_temperature(progress)
+        Returns the temperature at a fraction of the time budget
+
+    calc_overload(usage, battery_id, change)
+        Calculates how much the overload of a battery changes
+    """
+
+    def __init__(self, district, time_limit=None, start_temperature=START_TEMPERATURE, \
+        end_temperature=END_TEMPERATURE, schedule='geometric', penalty=None, swap_probability=SWAP_PROBABILITY, \
+        seed=None):
+        """Parameters
+        ----------
+        district : District object
+            A district with a configuration for unique cables
+
+        time_limit : float
+            Seconds to run, None to prompt the user like the iterations of the other algorithms
+
+        start_temperature, end_temperature : float
+            Temperature at the start and at the end of the time budget
+
+        schedule : str
+            'geometric' or 'linear' cooling from the start to the end temperature
+
+        penalty : float
+            Costs per unit of output above capacity, None to reject moves that overload a battery
+
+        swap_probability : float
+            Probability of a swap move, otherwise a shift move is tried
+
+        seed : int
+        """
+
+        if schedule not in SCHEDULES:
+            raise ValueError(f"unknown cooling schedule {schedule}, choose from {SCHEDULES}")
+
+        self.district = district
+        self.iterations = 0
+        self.time_limit = time_limit
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.schedule = schedule
+        self.penalty = penalty
+        self.swap_probability = swap_probability
+        self.rng = random.Random(seed)
+
+        self.capacities = district.arrays.capacities.tolist()
+        self.best_costs = float('inf')
+
+
+    def run(self):
+        """Runs the SimulatedAnnealing algorithm
+
+        Returns
+        ----------
+        District object
+        """
+
+        rng = self.rng
+        costs = self.district.costs
+        outputs = self.district.arrays.outputs.tolist()
+        n_houses = len(outputs)
+        n_batteries = len(self.capacities)
+
+        self.best_costs = float('inf')
+
+        assignment = self.init_assignment()
+        usage = [0] * n_batteries
+        for house_id, battery_id in enumerate(assignment):
+            usage[battery_id] += outputs[house_id]
+
+        total = sum(costs[house_id][battery_id] for house_id, battery_id in enumerate(assignment))
+        overload = sum(max(used - capacity, 0) for used, capacity in zip(usage, self.capacities))
+        penalty = self.penalty if self.penalty is not None else 0
+
+        best_assignment = list(assignment)
+        if overload <= EPSILON:
+            self.best_costs = total
+
+        # prompt the user for the seconds to run
+        time_limit = self.time_limit
+        if time_limit is None:
+            time_limit = self.prompt_iterations(default=TIME_LIMIT, name='seconds to run')
+
+        start = time.perf_counter()
+        temperature = self.start_temperature
+
+        while True:
+
+            # cool down with the time spent
+            if self.iterations % CHECK_INTERVAL == 0:
+                progress = (time.perf_counter() - start) / time_limit
+                if progress >= 1:
+                    break
+                temperature = self.get_temperature(progress)
+
+            self.iterations += 1
+            house_id = rng.randrange(n_houses)
+            battery_id = assignment[house_id]
+
+            # a single battery leaves no other battery to shift to
+            if n_batteries < 2 or rng.random() < self.swap_probability:
+
+                # swap with a house of another battery
+                swap_id = rng.randrange(n_houses)
+                swap_battery_id = assignment[swap_id]
+
+                if swap_battery_id == battery_id:
+                    continue
+
+                change = outputs[swap_id] - outputs[house_id]
+                delta = costs[house_id][swap_battery_id] + costs[swap_id][battery_id] \
+                    - costs[house_id][battery_id] - costs[swap_id][swap_battery_id]
+                overload_delta = self.calc_overload(usage, battery_id, change) \
+                    + self.calc_overload(usage, swap_battery_id, -change)
+
+            else:
+
+                # shift to another battery
+                swap_id = None
+                swap_battery_id = rng.randrange(n_batteries - 1)
+                if swap_battery_id >= battery_id:
+                    swap_battery_id += 1
+
+                change = -outputs[house_id]
+                delta = costs[house_id][swap_battery_id] - costs[house_id][battery_id]
+                overload_delta = self.calc_overload(usage, battery_id, change) \
+                    + self.calc_overload(usage, swap_battery_id, -change)
+
+            # without a penalty, moves may not overload a battery further
+            if self.penalty is None and overload_delta > 0:
+                continue
+
+            energy_delta = delta + penalty * overload_delta
+
+            if energy_delta > 0 and rng.random() >= math.exp(-energy_delta / temperature):
+                continue
+
+            # apply the move
+            assignment[house_id] = swap_battery_id
+            if swap_id is not None:
+                assignment[swap_id] = battery_id
+
+            usage[battery_id] += change
+            usage[swap_battery_id] -= change
+            total += delta
+            overload += overload_delta
+
+            if total < self.best_costs and overload <= EPSILON:
+                self.best_costs = total
+                best_assignment = list(assignment)
+
+        self.district.set_assignment(numpy.array(best_assignment))
+        self.set_district_cables(self.district)
+
+        return self.district
+
+
+    def init_assignment(self):
+        """Returns the assignment of the district as a list, with every free house connected to the cheapest
+        battery that has capacity left, or the cheapest battery if none has.
+
+        Returns
+        ----------
+        list
+        """
+
+        assignment = self.district.get_assignment()
+        usage = self.district.arrays.calc_usage(assignment).tolist()
+        outputs = self.district.arrays.outputs.tolist()
+
+        for house_id in range(len(assignment)):
+
+            if assignment[house_id] != FREE:
+                continue
+
+            costs = self.district.costs[house_id]
+            batteries = sorted(range(len(costs)), key=lambda battery_id: costs[battery_id])
+            fitting = [battery_id for battery_id in batteries \
+                if usage[battery_id] + outputs[house_id] <= self.capacities[battery_id]]
+
+            battery_id = fitting[0] if fitting else batteries[0]
+            assignment[house_id] = battery_id
+            usage[battery_id] += outputs[house_id]
+
+        return assignment.tolist()
+
+
+    def get_temperature(self, progress):
+        """Returns the temperature after a fraction of the time budget.
+
+        Parameters
+        ----------
+        progress : float
+            Fraction of the time budget that is spent
+
+        Returns
+        ----------
+        float
+        """
+
+        if self.schedule == 'linear':
+            return self.start_temperature + (self.end_temperature - self.start_temperature) * progress
+
+        return self.start_temperature * (self.end_temperature / self.start_temperature) ** progress
+
+
+    def calc_overload(self, usage, battery_id, change):
+        """Calculates how much the output above capacity of a battery changes when its usage changes.
+
+        Parameters
+        ----------
+        usage : list
+
+        battery_id : int
+
+        change : float
+            Change in usage
+
+        Returns
+        ----------
+        float
+        """
+
+        capacity = self.capacities[battery_id]
+        current = usage[battery_id]
+
+        return max(current + change - capacity, 0) - max(current - capacity, 0)
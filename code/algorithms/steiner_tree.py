@@ -0,0 +1,364 @@
+"""The SteinerTree algorithm uses a configuration that has already been formed for a district, and builds the
+shared cables of every battery as a rectilinear Steiner tree.
+It starts from the minimum spanning tree of the battery and its houses, and repeatedly adds extra points of
+the Hanan grid (every combination of an x and a y coordinate of the houses and battery) that make the spanning
+tree shorter, a batch per round (batched iterated 1-Steiner). The edges of the final tree are laid as L-shaped
+cables that overlap as much as possible.
+"""
+
+import numpy
+
+from .algorithm import Algorithm
+from ..classes.district import get_edges
+
+INFINITY = 10 ** 9
+
+class SteinerTree(Algorithm):
+    """Builds a rectilinear Steiner tree for every battery cluster. Every round, the gain of every Hanan grid point
+    is the decrease in length of the minimum spanning tree when that point is added. The gains of all candidates are
+    calculated at once by running Prim's algorithm for all candidates in parallel. The candidates are then added in
+    order of gain, as long as they still make the tree shorter, and added points with two or less neighbours are
+    removed again. This repeats until a round does not make the tree shorter.
+
+    Methods
+    ----------
+    run()
+        Runs the SteinerTree algorithm
+
+    build_tree(battery)
+        Finds the points and edges of the Steiner tree of a battery
+
+    lay_cables(battery, points, parents)
+        Lays the cables of the houses along the edges of a tree
+
+    get_mst(points)
+        Calculates a minimum spanning tree
+
+    calc_mst_lengths(points, candidates)
+        Calculates the spanning tree length for every candidate point added
+
+    remove_steiner_points(points, terminals)
+        Removes added points with two or less neighbours in the spanning tree
+
+    get_l_path(start_location, end_location, horizontal)
+        Creates an L-shaped path between two points
+    """
+
+    def __init__(self, district):
+        """Parameters
+        ----------
+        district : District object
+            A district with a prior configuration
+        """
+
+        self.district = district
+        self.district.shared = True
+        self.iterations = 0
+
+
+    def run(self):
+        """Runs the SteinerTree algorithm
+
+        Returns
+        ----------
+        District object
+        """
+
+        self.district.reset_cables()
+
+        for battery in self.district.batteries:
+
+            points, parents = self.build_tree(battery)
+            self.lay_cables(battery, points, parents)
+
+        return self.district
+
+
+    def build_tree(self, battery):
+        """Finds the points of a rectilinear Steiner tree of a battery and its houses with the batched iterated
+        1-Steiner heuristic.
+
+        Parameters
+        ----------
+        battery : Battery object
+
+        Returns
+        ----------
+        list
+            Points of the tree, the battery first, then the houses, then the added Steiner points
+
+        list
+            Index of the parent of every point, towards the battery
+        """
+
+        # the battery and the locations of its houses are the terminals
+        terminals = [battery.location]
+        for house in self.district.connections[battery.id]:
+            if house.location not in terminals:
+                terminals.append(house.location)
+
+        points = list(terminals)
+        length, parents = self.get_mst(points)
+
+        # Hanan grid of the terminals
+        xs = sorted(set(x for x, y in terminals))
+        ys = sorted(set(y for x, y in terminals))
+        hanan = [(x, y) for x in xs for y in ys]
+
+        while True:
+            self.iterations += 1
+            start_length = length
+
+            # calculate the gain of every candidate point at once
+            existing = set(points)
+            candidates = [point for point in hanan if point not in existing]
+
+            if not candidates:
+                break
+
+            gains = length - self.calc_mst_lengths(points, candidates)
+            order = numpy.argsort(-gains, kind="stable")
+
+            # add candidates in order of gain, as long as they still shorten the tree
+            for index in order:
+
+                if gains[index] <= 0:
+                    break
+
+                candidate = candidates[index]
+                new_length = int(self.calc_mst_lengths(points, [candidate])[0])
+
+                if new_length < length:
+                    points.append(candidate)
+                    length = new_length
+
+            points = self.remove_steiner_points(points, len(terminals))
+            length, parents = self.get_mst(points)
+
+            if length >= start_length:
+                break
+
+        return points, parents
+
+
+    def lay_cables(self, battery, points, parents):
+        """Lays the cables of the houses of a battery along the edges of a tree. Every edge is laid as the L-shape
+        that overlaps most with the edges laid before it, starting at the battery. A house's cable runs to its parent,
+        and continues along the edges of Steiner points that are not yet part of another house's cable.
+
+        Parameters
+        ----------
+        battery : Battery object
+
+        points : list
+            Points of the tree, the battery first, then the houses, then the added Steiner points
+
+        parents : list
+            Index of the parent of every point
+        """
+
+        # order points from the battery outwards
+        children = [[] for point in points]
+        for index, parent in enumerate(parents):
+            if parent is not None:
+                children[parent].append(index)
+
+        order = [0]
+        for index in order:
+            order += children[index]
+
+        # lay every edge as the L-shape that overlaps most with the network so far
+        laid_edges = set()
+        segments = {}
+        for index in order[1:]:
+            start = points[index]
+            end = points[parents[index]]
+            paths = [self.get_l_path(start, end, True), self.get_l_path(start, end, False)]
+
+            path = max(paths, key=lambda path: len(laid_edges.intersection(get_edges(path))))
+            laid_edges.update(get_edges(path))
+            segments[index] = path
+
+        # assign every segment to exactly one house
+        indices = {point: index for index, point in enumerate(points)}
+        houses = sorted(self.district.connections[battery.id], \
+            key=lambda house: order.index(indices[house.location]))
+        terminals = set(indices[house.location] for house in houses)
+        claimed = set()
+
+        for house in houses:
+            index = indices[house.location]
+
+            # a house at the battery or at an already connected location needs no cable
+            if index == 0 or index in claimed:
+                self.district.add_cable(house, [house.location])
+                continue
+
+            claimed.add(index)
+            path = list(segments[index])
+            parent = parents[index]
+
+            while parent != 0 and parent not in terminals and parent not in claimed:
+                claimed.add(parent)
+                path += segments[parent][1:]
+                parent = parents[parent]
+
+            self.district.add_cable(house, path)
+
+
+    def get_mst(self, points):
+        """Calculates the rectilinear minimum spanning tree of points with Prim's algorithm, starting at the
+        first point.
+
+        Parameters
+        ----------
+        points : list
+
+        Returns
+        ----------
+        int
+            Length of the tree
+
+        list
+            Index of the parent of every point, None for the first point
+        """
+
+        xs = numpy.array([x for x, y in points])
+        ys = numpy.array([y for x, y in points])
+        dists = numpy.abs(xs[:, None] - xs[None, :]) + numpy.abs(ys[:, None] - ys[None, :])
+
+        in_tree = numpy.zeros(len(points), dtype=bool)
+        in_tree[0] = True
+        best = dists[0].copy()
+        parents = numpy.zeros(len(points), dtype=int)
+        length = 0
+
+        for step in range(len(points) - 1):
+            masked = numpy.where(in_tree, INFINITY, best)
+            index = int(numpy.argmin(masked))
+            length += int(masked[index])
+            in_tree[index] = True
+
+            # update the shortest connection to the tree
+            closer = (dists[index] < best) & ~in_tree
+            best[closer] = dists[index][closer]
+            parents[closer] = index
+
+        parents = parents.tolist()
+        parents[0] = None
+
+        return length, parents
+
+
+    def calc_mst_lengths(self, points, candidates):
+        """Calculates the length of the rectilinear minimum spanning tree of the points plus one candidate point,
+        for every candidate. Prim's algorithm runs for all candidates in parallel, with the candidate as last point.
+
+        Parameters
+        ----------
+        points : list
+
+        candidates : list
+
+        Returns
+        ----------
+        numpy.ndarray
+        """
+
+        n_points = len(points)
+        rows = numpy.arange(len(candidates))
+
+        xs = numpy.array([x for x, y in points])
+        ys = numpy.array([y for x, y in points])
+        candidate_xs = numpy.array([x for x, y in candidates])
+        candidate_ys = numpy.array([y for x, y in candidates])
+
+        # distances between the points, and from every candidate to the points
+        dists = numpy.abs(xs[:, None] - xs[None, :]) + numpy.abs(ys[:, None] - ys[None, :])
+        candidate_dists = numpy.abs(candidate_xs[:, None] - xs[None, :]) \
+            + numpy.abs(candidate_ys[:, None] - ys[None, :])
+
+        # start every tree at the first point
+        in_tree = numpy.zeros((len(candidates), n_points + 1), dtype=bool)
+        in_tree[:, 0] = True
+        best = numpy.concatenate([numpy.broadcast_to(dists[0], (len(candidates), n_points)), \
+            candidate_dists[:, :1]], axis=1)
+        lengths = numpy.zeros(len(candidates), dtype=int)
+
+        for step in range(n_points):
+            masked = numpy.where(in_tree, INFINITY, best)
+            index = numpy.argmin(masked, axis=1)
+            lengths += masked[rows, index]
+            in_tree[rows, index] = True
+
+            # distances from the added point to all points, which is the candidate for the last index
+            is_candidate = index == n_points
+            point_index = numpy.minimum(index, n_points - 1)
+            point_dists = numpy.where(is_candidate[:, None], candidate_dists, dists[point_index])
+            last_dists = numpy.where(is_candidate, 0, candidate_dists[rows, point_index])
+
+            best = numpy.minimum(best, numpy.concatenate([point_dists, last_dists[:, None]], axis=1))
+
+        return lengths
+
+
+    def remove_steiner_points(self, points, n_terminals):
+        """Removes added points that have two or less neighbours in the minimum spanning tree, since connecting
+        their neighbours directly is never longer. Repeats until every added point has at least three neighbours.
+
+        Parameters
+        ----------
+        points : list
+
+        n_terminals : int
+            Number of points at the start of the list that are battery and houses
+
+        Returns
+        ----------
+        list
+        """
+
+        while len(points) > n_terminals:
+            length, parents = self.get_mst(points)
+
+            degrees = [0] * len(points)
+            for index, parent in enumerate(parents):
+                if parent is not None:
+                    degrees[index] += 1
+                    degrees[parent] += 1
+
+            keep = [index < n_terminals or degrees[index] > 2 for index in range(len(points))]
+
+            if all(keep):
+                break
+
+            points = [point for point, kept in zip(points, keep) if kept]
+
+        return points
+
+
+    def get_l_path(self, start_location, end_location, horizontal):
+        """Creates an L-shaped path between two points, which first moves horizontally or vertically.
+
+        Parameters
+        ----------
+        start_location : tuple
+
+        end_location : tuple
+
+        horizontal : bool
+            Whether to move horizontally first
+
+        Returns
+        ----------
+        list
+        """
+
+        if horizontal:
+            return self.get_path(start_location, end_location)
+
+        # make the path the other way around, vertical first from the start
+        path = self.get_path(end_location, start_location)
+        path.reverse()
+
+        return path
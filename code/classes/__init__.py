@@ -1,4 +1,7 @@
 """Classes for representing a SmartGrid district.
 """
 
-from .district import District
\ No newline at end of file
+from .connectpoints import Connectpoints
+from .district import District
+from .district_arrays import DistrictArrays
+from .distance_field import DistanceField
\ No newline at end of file
@@ -1,8 +1,14 @@
+from functools import total_ordering
+
+@total_ordering
 class Battery():
     """Representation of a battery in a SmartGrid district. A battery is defined by its ID, 
-    location, capacity and building costs. 
+    location, capacity and building costs. Batteries are compared, hashed and ordered by 
+    their ID, so copies of a battery in other districts or processes are the same battery.
     """
 
+    __slots__ = ("id", "location", "capacity", "cost")
+
     def __init__(self, uid, location, capacity, cost):
         """Parameters
         ----------
@@ -18,6 +24,24 @@ class Battery():
         self.location = location
         self.capacity = capacity
         self.cost = cost
+
+
+    def __eq__(self, other):
+        if not isinstance(other, Battery):
+            return NotImplemented
+
+        return self.id == other.id
+
+
+    def __lt__(self, other):
+        if not isinstance(other, Battery):
+            return NotImplemented
+
+        return self.id < other.id
+
+
+    def __hash__(self):
+        return hash(self.id)
         
 
     def __repr__(self):
@@ -0,0 +1,190 @@
+"""Spatial index of the connectpoints of a battery network. Connectpoints are the grid points a new cable
+can connect to: the battery itself and every point of the cables that are already laid.
+"""
+
+BUCKET_SIZE = 5
+
+class Connectpoints():
+    """This class stores the connectpoints of one battery network without duplicates, grouped in square
+    buckets of the grid. The nearest connectpoint of a location is found by searching the buckets in
+    rings around the location, so only the points close to the location are compared.
+
+    Attributes
+    ----------
+    points : dict
+        Every connectpoint with the order in which it was added {POINT: INDEX}
+
+    buckets : dict
+        Connectpoints per bucket {(BUCKET_X, BUCKET_Y): [POINT, POINT, ...]}
+
+    bucket_size : int
+        Width and height of a bucket
+
+    Methods
+    ----------
+    add(point)
+        Adds a connectpoint
+
+    add_path(path)
+        Adds all points of a cable path as connectpoints
+
+    nearest(location)
+        Finds the nearest connectpoint to a location
+    """
+
+    def __init__(self, points=(), bucket_size=BUCKET_SIZE):
+        """Parameters
+        ----------
+        points : iterable
+            Initial connectpoints
+
+        bucket_size : int
+        """
+
+        self.points = {}
+        self.buckets = {}
+        self.bucket_size = bucket_size
+
+        # range of occupied buckets, to know when the search can stop
+        self.min_x = self.min_y = float('inf')
+        self.max_x = self.max_y = -float('inf')
+
+        for point in points:
+            self.add(point)
+
+
+    def __len__(self):
+        return len(self.points)
+
+
+    def __contains__(self, point):
+        return point in self.points
+
+
+    def add(self, point):
+        """Adds a connectpoint, if it is not a connectpoint already.
+
+        Parameters
+        ----------
+        point : tuple
+        """
+
+        if point in self.points:
+            return
+
+        self.points[point] = len(self.points)
+
+        bucket_x = point[0] // self.bucket_size
+        bucket_y = point[1] // self.bucket_size
+        bucket = (bucket_x, bucket_y)
+
+        if bucket in self.buckets:
+            self.buckets[bucket].append(point)
+            return
+
+        self.buckets[bucket] = [point]
+
+        # extend the range of occupied buckets
+        if bucket_x < self.min_x:
+            self.min_x = bucket_x
+        if bucket_x > self.max_x:
+            self.max_x = bucket_x
+        if bucket_y < self.min_y:
+            self.min_y = bucket_y
+        if bucket_y > self.max_y:
+            self.max_y = bucket_y
+
+
+    def add_path(self, path):
+        """Adds all points of a cable path as connectpoints.
+
+        Parameters
+        ----------
+        path : list
+        """
+
+        for point in path:
+            self.add(point)
+
+
+    def nearest(self, location):
+        """Finds the connectpoint with the shortest Manhattan distance to a location. When several
+        connectpoints are equally near, the one that was added first is returned.
+
+        Parameters
+        ----------
+        location : tuple
+
+        Returns
+        ----------
+        tuple
+            Nearest connectpoint, or None if there are no connectpoints
+        """
+
+        if not self.points:
+            return None
+
+        x, y = location
+        center_x = x // self.bucket_size
+        center_y = y // self.bucket_size
+
+        # the furthest ring that still contains occupied buckets
+        max_ring = max(center_x - self.min_x, self.max_x - center_x, center_y - self.min_y, \
+            self.max_y - center_y)
+
+        buckets = self.buckets
+        points = self.points
+        best_point = None
+        best_dist = float('inf')
+        best_index = 0
+
+        for ring in range(max_ring + 1):
+
+            # points in this ring are at least this far away
+            if best_dist <= (ring - 1) * self.bucket_size:
+                break
+
+            for bucket in self.get_ring(center_x, center_y, ring):
+
+                if bucket not in buckets:
+                    continue
+
+                for point in buckets[bucket]:
+                    dist = abs(point[0] - x) + abs(point[1] - y)
+
+                    if dist < best_dist or (dist == best_dist and points[point] < best_index):
+                        best_dist = dist
+                        best_index = points[point]
+                        best_point = point
+
+        return best_point
+
+
+    def get_ring(self, center_x, center_y, ring):
+        """Returns the buckets at a Chebyshev distance of ring buckets from the center bucket.
+
+        Parameters
+        ----------
+        center_x, center_y : int
+
+        ring : int
+
+        Returns
+        ----------
+        list
+        """
+
+        if ring == 0:
+            return [(center_x, center_y)]
+
+        buckets = []
+
+        for bucket_x in range(center_x - ring, center_x + ring + 1):
+            buckets.append((bucket_x, center_y - ring))
+            buckets.append((bucket_x, center_y + ring))
+
+        for bucket_y in range(center_y - ring + 1, center_y + ring):
+            buckets.append((center_x - ring, bucket_y))
+            buckets.append((center_x + ring, bucket_y))
+
+        return buckets
@@ -6,10 +6,28 @@ final configuration.
 import csv
 
 from .battery import Battery
+from .district_arrays import DistrictArrays, FREE, CABLE_COST
 from .house import House
 
 BATTERY_COST = 5000
 
+
+def get_edges(path):
+    """Returns the unit grid edges of a cable path. Every edge is a tuple of its two end points, the
+    smallest point first, so the same edge of two paths is equal.
+
+    Parameters
+    ----------
+    path : list
+
+    Returns
+    ----------
+    list
+    """
+
+    return [(start, end) if start < end else (end, start) for start, end in zip(path, path[1:])]
+
+
 class District():
     """This class upholds a data structure for a SmartGrid with houses and batteries, and creates the
     possibility to add connections and unique or shared cables between houses and batteries. All information
@@ -35,14 +53,35 @@ class District():
     reset_connections()
         Resets the whole district
 
+    get_assignment()
+        Returns a copy of the assignment vector of the district
+
+    set_assignment(assignment)
+        Sets connections in a district to a given assignment vector
+
+    snapshot()
+        Captures the connections and cables of the district
+
+    restore(snapshot)
+        Restores the connections and cables of a snapshot
+
+    index_connections()
+        Recalculates battery usage and the house index from the connections
+
+    check_consistency()
+        Checks if the maintained battery usage and house index match the connections
+
     add_cable(house, path)
         Adds a cable path to the specified house
 
+    remove_cable(house)
+        Removes the cable path of the specified house
+
     reset_cables()
         Remove all cable data from the district
         
     get_empty_house()
-        Find a house that is not yet connected
+        Find the most recently freed house that is not yet connected
 
     get_empty_houses()
         Finds all free houses in connections
@@ -66,7 +105,13 @@ class District():
         Calculate costs of a unique district
 
     calc_cables_costs()
-        Calculate costs of a shared district
+        Calculate costs of the cables in a unique or shared district
+
+    calc_move_delta(house, battery)
+        Calculate the change in connection costs when a house moves to a battery
+
+    calc_swap_delta(house1, house2)
+        Calculate the change in connection costs when two houses swap batteries
 
     calc_dist(object1, object2)
         Calculate Manhattan distance between two objects in the district
@@ -82,7 +127,7 @@ class District():
         
     """
 
-    def __init__(self, uid, batteries_file, houses_file):
+    def __init__(self, uid, batteries_file, houses_file, consistency_check=False):
         """Parameters
         ----------
         uid : int
@@ -90,13 +135,44 @@ class District():
         batteries_file : .csv-file
 
         houses_file : .csv_file
+
+        consistency_check : bool
+            Validate the maintained usage, house index and costs after every connection or cable change
         """
         self.id = uid
         self.connections = {}
+        self.usage = {}
+        self.consistency_check = consistency_check
         self.batteries = self.load_batteries(batteries_file)
         self.houses = self.load_houses(houses_file)
         self.cables = {}
 
+        # whether houses share cables, which decides how cables are charged
+        self.shared = False
+
+        # network of every battery as grid edges with the number of cables using them
+        # {BATTERY_ID: {EDGE: COUNT}}, and the battery of every cable {HOUSE_ID: BATTERY_ID}
+        self.edges = {battery.id: {} for battery in self.batteries}
+        self.cable_batteries = {}
+
+        # house index {HOUSE_ID: BATTERY_ID} and free houses {HOUSE_ID: HOUSE}
+        self.house_battery = {}
+        self.unassigned = {house.id: house for house in reversed(self.houses)}
+
+        # array representation with the battery ID of every house
+        self.arrays = DistrictArrays(self.houses, self.batteries)
+        self.assignment = self.arrays.empty_assignment()
+
+        # distances and unique cable costs [HOUSE_ID][BATTERY_ID]
+        self.distances = self.arrays.distances.tolist()
+        self.costs = self.arrays.costs.tolist()
+
+        # running cost totals
+        self.batteries_cost = sum(battery.cost for battery in self.batteries)
+        self.connections_cost = 0
+        self.cables_cost = 0
+        self.shared_cables_cost = 0
+
 
     def load_batteries(self, file_path):
         """
@@ -123,6 +199,7 @@ class District():
                 capacity = float(row["capaciteit"])
                 batteries.append(Battery(i, location, capacity, BATTERY_COST))
                 self.connections[i] = []
+                self.usage[i] = 0
 
         return batteries
 
@@ -164,6 +241,14 @@ class District():
         """
 
         self.connections[battery.id].append(house)
+        self.usage[battery.id] += house.output
+        self.house_battery[house.id] = battery.id
+        self.unassigned.pop(house.id, None)
+        self.assignment[house.id] = battery.id
+        self.connections_cost += self.costs[house.id][battery.id]
+
+        if self.consistency_check:
+            self.check_consistency()
 
 
     def remove_connection(self, battery, house):
@@ -177,6 +262,14 @@ class District():
         """
 
         self.connections[battery.id].remove(house)
+        self.usage[battery.id] -= house.output
+        del self.house_battery[house.id]
+        self.unassigned[house.id] = house
+        self.assignment[house.id] = FREE
+        self.connections_cost -= self.costs[house.id][battery.id]
+
+        if self.consistency_check:
+            self.check_consistency()
 
 
     def set_connections(self, connections):
@@ -188,6 +281,10 @@ class District():
         """
 
         self.connections = connections
+        self.index_connections()
+
+        if self.consistency_check:
+            self.check_consistency()
 
 
     def reset_connections(self):
@@ -196,10 +293,179 @@ class District():
 
         for battery in self.batteries:
             self.connections[battery.id] = []
+            self.usage[battery.id] = 0
+
+        self.house_battery = {}
+        self.unassigned = {house.id: house for house in reversed(self.houses)}
+        self.assignment[:] = FREE
+        self.connections_cost = 0
+
+
+    def get_assignment(self):
+        """Returns a copy of the assignment vector, which holds the battery ID of every house.
+
+        Returns
+        ----------
+        numpy.ndarray
+        """
+
+        return self.assignment.copy()
+
+
+    def set_assignment(self, assignment):
+        """Modifies a district to contain the connections of an assignment vector. Houses are 
+        connected to their battery in order of ID. 
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+        """
+
+        houses = sorted(self.houses, key=lambda house: house.id)
+        connections = {battery.id: [] for battery in self.batteries}
+
+        for house, battery_id in zip(houses, assignment.tolist()):
+            if battery_id != FREE:
+                connections[battery_id].append(house)
+
+        self.set_connections(connections)
+
+
+    def snapshot(self):
+        """Captures the mutable state of the district: the connections, the data derived from them and
+        the cables. Houses, batteries and cable paths are referenced instead of copied, so a snapshot is
+        cheap to make and can be restored any number of times.
+
+        Returns
+        ----------
+        dict
+        """
+
+        return {
+            "connections": {battery_id: tuple(houses) for battery_id, houses in self.connections.items()},
+            "usage": dict(self.usage),
+            "house_battery": dict(self.house_battery),
+            "unassigned": dict(self.unassigned),
+            "assignment": self.assignment.copy(),
+            "connections_cost": self.connections_cost,
+            "cables": dict(self.cables),
+            "cables_cost": self.cables_cost,
+            "edges": {battery_id: dict(edges) for battery_id, edges in self.edges.items()},
+            "cable_batteries": dict(self.cable_batteries),
+            "shared_cables_cost": self.shared_cables_cost
+        }
+
+
+    def restore(self, snapshot):
+        """Restores the connections and cables of the district to a snapshot.
+
+        Parameters
+        ----------
+        snapshot : dict
+        """
+
+        self.connections = {battery_id: list(houses) for battery_id, houses in snapshot["connections"].items()}
+        self.usage = dict(snapshot["usage"])
+        self.house_battery = dict(snapshot["house_battery"])
+        self.unassigned = dict(snapshot["unassigned"])
+        self.assignment = snapshot["assignment"].copy()
+        self.connections_cost = snapshot["connections_cost"]
+        self.cables = dict(snapshot["cables"])
+        self.cables_cost = snapshot["cables_cost"]
+        self.edges = {battery_id: dict(edges) for battery_id, edges in snapshot["edges"].items()}
+        self.cable_batteries = dict(snapshot["cable_batteries"])
+        self.shared_cables_cost = snapshot["shared_cables_cost"]
+
+        if self.consistency_check:
+            self.check_consistency()
+
+
+    def index_connections(self):
+        """Recalculates the usage of every battery, the battery of every house and the free houses
+        from scratch using the current connections. Free houses are ordered like the houses list, 
+        so the first house in the list is the first empty house.
+        """
+
+        self.house_battery = {}
+        self.assignment[:] = FREE
+        self.connections_cost = 0
+
+        for battery in self.batteries:
+            self.usage[battery.id] = 0
+            self.connections_cost += self.calc_battery_connections_costs(battery)
+
+            for house in self.connections[battery.id]:
+                self.usage[battery.id] += house.output
+                self.house_battery[house.id] = battery.id
+                self.assignment[house.id] = battery.id
+
+        self.unassigned = {house.id: house for house in reversed(self.houses) \
+            if house.id not in self.house_battery}
+
+
+    def check_consistency(self):
+        """Checks if the maintained battery usage, house index and costs still match the connections
+        and cables. Small differences in usage caused by floating point rounding are accepted.
+
+        Raises
+        ----------
+        ValueError
+            If the usage, index or costs do not match the connections and cables
+        """
+
+        connected = 0
+
+        for battery in self.batteries:
+            usage = sum(house.output for house in self.connections[battery.id])
+
+            if abs(usage - self.usage[battery.id]) > 1e-6:
+                raise ValueError(f"usage of battery {battery.id} is {self.usage[battery.id]}, expected {usage}")
+
+            for house in self.connections[battery.id]:
+                if self.house_battery.get(house.id) != battery.id:
+                    raise ValueError(f"house {house.id} is not indexed at battery {battery.id}")
+
+            connected += len(self.connections[battery.id])
+
+        if connected != len(self.house_battery):
+            raise ValueError(f"{len(self.house_battery)} houses indexed, expected {connected}")
+
+        for house in self.houses:
+            if (house.id in self.unassigned) == (house.id in self.house_battery):
+                raise ValueError(f"house {house.id} is both free and connected, or neither")
+
+            if self.assignment[house.id] != self.house_battery.get(house.id, FREE):
+                raise ValueError(f"house {house.id} has a wrong assignment")
+
+        connections_cost = sum(self.calc_battery_connections_costs(battery) for battery in self.batteries)
+
+        if connections_cost != self.connections_cost:
+            raise ValueError(f"connections cost is {self.connections_cost}, expected {connections_cost}")
+
+        cables_cost = sum((len(path) - 1) * CABLE_COST for path in self.cables.values())
+
+        if cables_cost != self.cables_cost:
+            raise ValueError(f"cables cost is {self.cables_cost}, expected {cables_cost}")
+
+        edges = {}
+        for house_id, path in self.cables.items():
+            battery_edges = edges.setdefault(self.cable_batteries[house_id], {})
+
+            for edge in get_edges(path):
+                battery_edges[edge] = battery_edges.get(edge, 0) + 1
+
+        if edges != {battery_id: counts for battery_id, counts in self.edges.items() if counts}:
+            raise ValueError("cable edges do not match the cables")
+
+        shared_cables_cost = sum(len(counts) for counts in edges.values()) * CABLE_COST
+
+        if shared_cables_cost != self.shared_cables_cost:
+            raise ValueError(f"shared cables cost is {self.shared_cables_cost}, expected {shared_cables_cost}")
 
 
     def add_cable(self, house, path):
-        """Adds a cable path to the specified house
+        """Adds a cable path to the specified house, replacing its current cable. The cable becomes 
+        part of the network of the battery the house is connected to.
 
         Parameters
         ----------
@@ -207,7 +473,53 @@ class District():
         path: list
         """
 
+        if house.id in self.cables:
+            self.remove_cable(house)
+
+        battery_id = self.house_battery.get(house.id)
+        edges = self.edges.setdefault(battery_id, {})
+
         self.cables[house.id] = path
+        self.cable_batteries[house.id] = battery_id
+        self.cables_cost += (len(path) - 1) * CABLE_COST
+
+        # an edge is only paid for by the first cable that uses it
+        for edge in get_edges(path):
+            count = edges.get(edge, 0)
+
+            if count == 0:
+                self.shared_cables_cost += CABLE_COST
+
+            edges[edge] = count + 1
+
+        if self.consistency_check:
+            self.check_consistency()
+
+
+    def remove_cable(self, house):
+        """Removes the cable path of the specified house
+
+        Parameters
+        ----------
+        house: House object
+        """
+
+        path = self.cables.pop(house.id)
+        edges = self.edges[self.cable_batteries.pop(house.id)]
+        self.cables_cost -= (len(path) - 1) * CABLE_COST
+
+        # an edge is free again when the last cable using it is removed
+        for edge in get_edges(path):
+            count = edges[edge] - 1
+
+            if count == 0:
+                self.shared_cables_cost -= CABLE_COST
+                del edges[edge]
+            else:
+                edges[edge] = count
+
+        if self.consistency_check:
+            self.check_consistency()
             
 
     def reset_cables(self):
@@ -215,48 +527,35 @@ class District():
         """
     
         self.cables = {}
+        self.cables_cost = 0
+        self.edges = {battery.id: {} for battery in self.batteries}
+        self.cable_batteries = {}
+        self.shared_cables_cost = 0
     
 
     def get_empty_house(self):
-        """Returns a house that is not yet connected, if there is one.
+        """Returns the most recently freed house that is not yet connected, if there is one.
 
         Returns
         ----------
         House object
         """
 
-        connected_houses = []
-        for values in self.connections.values():
-            connected_houses += values
+        if not self.unassigned:
+            return None
 
-     
-        for house in self.houses:
-            if house not in connected_houses:
-                return house
-        
-        return None
+        return next(reversed(self.unassigned.values()))
 
 
     def get_empty_houses(self):
-        """Finds all free houses in connections.
+        """Finds all free houses in connections, the most recently freed house first.
 
         Returns
         ----------
         list
         """
 
-        connected_houses = []
-        empty_houses = []
-
-        for values in self.connections.values():
-            connected_houses += values
-
-     
-        for house in self.houses:
-            if house not in connected_houses:
-                empty_houses.append(house)
-        
-        return empty_houses
+        return list(reversed(self.unassigned.values()))
 
 
     def get_possible_batteries(self, house):
@@ -290,12 +589,8 @@ class District():
         ----------
         float
         """
-        usage = 0
-        
-        for house in self.connections[battery.id]:
-            usage += house.output
 
-        return usage
+        return self.usage[battery.id]
 
 
     def is_overload(self):
@@ -308,7 +603,7 @@ class District():
         
         for battery in self.batteries:
 
-            if self.get_usage(battery) > battery.capacity:
+            if self.usage[battery.id] > battery.capacity:
                 return True
         
         return False
@@ -328,7 +623,7 @@ class District():
         bool
         """
 
-        return self.get_usage(battery) + house.output > battery.capacity
+        return self.usage[battery.id] + house.output > battery.capacity
 
 
     def calc_battery_connections_costs(self, battery):
@@ -347,61 +642,101 @@ class District():
         costs = 0
 
         for house in houses:
-            costs += self.calc_dist(house, battery) * 9
+            costs += self.costs[house.id][battery.id]
 
         return costs
 
 
     def calc_connection_costs(self):
-        """Calculates the total cost of the district, adding battery costs and connections costs.
+        """Returns the total cost of the district, adding battery costs and connections costs. The
+        totals are kept up to date with every connection change.
 
         Returns
         ----------
         dict
         """
 
-        connections_cost = 0
-        batt_cost = 0
-
-        for battery in self.batteries:
-            batt_cost += battery.cost
-            connections_cost += self.calc_battery_connections_costs(battery)
-
         costs = {
-            "connections": connections_cost,
-            "batteries": batt_cost,
-            "total": connections_cost + batt_cost
+            "connections": self.connections_cost,
+            "batteries": self.batteries_cost,
+            "total": self.connections_cost + self.batteries_cost
         }
 
         return costs
 
 
     def calc_cables_costs(self):
-        """Calculates the total cost of the district with shared cables instead of unique connections.
+        """Returns the total cost of the cables and batteries of the district. In a shared district every 
+        grid edge of a battery network is paid for once, no matter how many cables use it, otherwise 
+        every cable is paid for separately. The totals are kept up to date with every cable change.
 
         Returns
         ----------
         dict
         """
 
-        cables_cost = 0
-        batt_cost = 0
-
-        for battery in self.batteries:
-            batt_cost += battery.cost
-        
-        for path in self.cables.values():
-            cables_cost += (len(path) - 1) * 9
+        if self.shared:
+            cables_cost = self.shared_cables_cost
+        else:
+            cables_cost = self.cables_cost
         
         costs = {
             "cables": cables_cost,
-            "batteries": batt_cost,
-            "total": cables_cost + batt_cost
+            "batteries": self.batteries_cost,
+            "total": cables_cost + self.batteries_cost
         }
 
         return costs
 
 
+    def calc_move_delta(self, house, battery):
+        """Calculates how much the connection costs change when a house is connected to a battery
+        instead of its current battery, without modifying the district. A free house adds its full
+        connection costs.
+
+        Parameters
+        ----------
+        house : House object
+
+        battery : Battery object
+
+        Returns
+        ----------
+        int
+        """
+
+        costs = self.costs[house.id]
+        current = self.house_battery.get(house.id)
+
+        if current is None:
+            return costs[battery.id]
+
+        return costs[battery.id] - costs[current]
+
+
+    def calc_swap_delta(self, house1, house2):
+        """Calculates how much the connection costs change when two connected houses swap batteries,
+        without modifying the district.
+
+        Parameters
+        ----------
+        house1 : House object
+
+        house2 : House object
+
+        Returns
+        ----------
+        int
+        """
+
+        battery1 = self.house_battery[house1.id]
+        battery2 = self.house_battery[house2.id]
+        costs1 = self.costs[house1.id]
+        costs2 = self.costs[house2.id]
+
+        return costs1[battery2] + costs2[battery1] - costs1[battery1] - costs2[battery2]
+
+
     def calc_dist(self, object1, object2):
         """Calculates manhatten distance between two objects.
 
@@ -417,19 +752,14 @@ class District():
 
 
     def all_houses_connected(self):
-        """Checks if there are 150 cables in a unique cable district.
+        """Checks if every house in the district is connected to a battery.
 
         Returns
         ----------
         bool
         """
 
-        houses_connected = 0
-        
-        for houses in self.connections.values():
-            houses_connected += len(houses)
-
-        return houses_connected == 150
+        return len(self.house_battery) == len(self.houses)
 
 
     def get_house_battery(self, house):
@@ -440,11 +770,12 @@ class District():
         Battery object
         """
 
-        for battery in self.batteries:
-            houses = self.connections[battery.id]
+        battery_id = self.house_battery.get(house.id)
+
+        if battery_id is None:
+            return None
 
-            if house in houses:
-                return battery
+        return self.batteries[battery_id]
 
 
     def print_district_status(self):
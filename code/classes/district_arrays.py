@@ -0,0 +1,196 @@
+"""Array representation of a SmartGrid district. The houses and batteries are stored as NumPy arrays
+indexed by their ID, and a configuration is a single assignment vector that holds the battery ID of
+every house, or -1 for a free house.
+"""
+
+import numpy
+
+FREE = -1
+
+# costs per grid unit of cable, shared with District
+CABLE_COST = 9
+
+class DistrictArrays():
+    """This class stores the immutable data of the houses and batteries of a district as NumPy arrays, so
+    algorithms can compute usage, costs and validity of a whole configuration at once. A configuration is
+    represented by an assignment vector, which is cheap to copy and compare.
+
+    Attributes
+    ----------
+    house_x, house_y : numpy.ndarray
+        Coordinates of the houses
+
+    outputs : numpy.ndarray
+        Output of the houses
+
+    battery_x, battery_y : numpy.ndarray
+        Coordinates of the batteries
+
+    capacities : numpy.ndarray
+        Capacity of the batteries
+
+    battery_costs : numpy.ndarray
+        Building costs of the batteries
+
+    distances : numpy.ndarray
+        Manhattan distance matrix with a row for every house and a column for every battery
+
+    costs : numpy.ndarray
+        Costs of a unique cable for every house and battery
+
+    width, height : int
+        Size of the grid that contains all houses and batteries
+
+    Methods
+    ----------
+    empty_assignment()
+        Returns an assignment vector without connections
+
+    calc_dists(assignment)
+        Calculates the distance of every connected house to its battery
+
+    calc_usage(assignment)
+        Calculates the usage of every battery
+
+    calc_costs(assignment)
+        Calculates the costs of a unique cable configuration
+
+    is_overload(assignment)
+        Checks if the usage of any battery exceeds capacity
+
+    is_valid(assignment)
+        Checks if all houses are connected without exceeding capacity
+    """
+
+    def __init__(self, houses, batteries):
+        """Parameters
+        ----------
+        houses : list
+            House objects of the district
+
+        batteries : list
+            Battery objects of the district
+        """
+
+        houses = sorted(houses, key=lambda house: house.id)
+        batteries = sorted(batteries, key=lambda battery: battery.id)
+
+        self.house_x = numpy.array([house.location[0] for house in houses], dtype=int)
+        self.house_y = numpy.array([house.location[1] for house in houses], dtype=int)
+        self.outputs = numpy.array([house.output for house in houses], dtype=float)
+
+        self.battery_x = numpy.array([battery.location[0] for battery in batteries], dtype=int)
+        self.battery_y = numpy.array([battery.location[1] for battery in batteries], dtype=int)
+        self.capacities = numpy.array([battery.capacity for battery in batteries], dtype=float)
+        self.battery_costs = numpy.array([battery.cost for battery in batteries], dtype=int)
+
+        self.distances = numpy.abs(self.house_x[:, None] - self.battery_x[None, :]) \
+            + numpy.abs(self.house_y[:, None] - self.battery_y[None, :])
+        self.costs = self.distances * CABLE_COST
+
+        self.width = int(max(self.house_x.max(), self.battery_x.max())) + 1
+        self.height = int(max(self.house_y.max(), self.battery_y.max())) + 1
+
+
+    def empty_assignment(self):
+        """Returns an assignment vector in which no house is connected.
+
+        Returns
+        ----------
+        numpy.ndarray
+        """
+
+        return numpy.full(len(self.outputs), FREE, dtype=int)
+
+
+    def calc_dists(self, assignment):
+        """Calculates the Manhattan distance of every connected house to its battery. Free houses
+        have distance 0.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        Returns
+        ----------
+        numpy.ndarray
+        """
+
+        connected = assignment != FREE
+
+        dists = numpy.zeros(len(assignment), dtype=int)
+        dists[connected] = self.distances[connected, assignment[connected]]
+
+        return dists
+
+
+    def calc_usage(self, assignment):
+        """Calculates how much of the capacity of every battery is used by the connected houses.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        Returns
+        ----------
+        numpy.ndarray
+        """
+
+        connected = assignment != FREE
+
+        return numpy.bincount(assignment[connected], weights=self.outputs[connected], \
+            minlength=len(self.capacities))
+
+
+    def calc_costs(self, assignment):
+        """Calculates the costs of a configuration with a unique cable for every house.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        Returns
+        ----------
+        dict
+        """
+
+        connections_cost = int(self.calc_dists(assignment).sum()) * CABLE_COST
+        batt_cost = int(self.battery_costs.sum())
+
+        costs = {
+            "connections": connections_cost,
+            "batteries": batt_cost,
+            "total": connections_cost + batt_cost
+        }
+
+        return costs
+
+
+    def is_overload(self, assignment):
+        """Returns if the usage of any battery exceeds capacity.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        Returns
+        ----------
+        bool
+        """
+
+        return bool(numpy.any(self.calc_usage(assignment) > self.capacities))
+
+
+    def is_valid(self, assignment):
+        """Returns if all houses are connected and no battery exceeds capacity.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+
+        Returns
+        ----------
+        bool
+        """
+
+        return bool(numpy.all(assignment != FREE)) and not self.is_overload(assignment)
@@ -1,7 +1,14 @@
+from functools import total_ordering
+
+@total_ordering
 class House():
     """Representation of a house in a SmartGrid district. A house is defined by its ID, 
-    location and energy output. 
+    location and energy output. Houses are compared, hashed and ordered by their ID, so 
+    copies of a house in other districts or processes are the same house.
     """
+
+    __slots__ = ("id", "location", "output")
+
     def __init__(self, uid, location, output):
         """Parameters
         ----------
@@ -15,6 +22,24 @@ class House():
         self.id = uid
         self.location = location
         self.output = output
+
+
+    def __eq__(self, other):
+        if not isinstance(other, House):
+            return NotImplemented
+
+        return self.id == other.id
+
+
+    def __lt__(self, other):
+        if not isinstance(other, House):
+            return NotImplemented
+
+        return self.id < other.id
+
+
+    def __hash__(self):
+        return hash(self.id)
         
         
     def __repr__(self):
@@ -17,6 +17,7 @@ def load_connections(district, file_path):
     """
 
     connections = {}
+    houses = {house.id: house for house in district.houses}
 
     # open the csv file
     with open(file_path, 'r') as in_file: 
@@ -31,11 +32,7 @@ def load_connections(district, file_path):
 
             # create the connections dictionary
             for house_id in house_ids:
-
-                for house in district.houses:
-
-                    if house_id == house.id:
-                        connections[battery_id].append(house)
+                connections[battery_id].append(houses[house_id])
     
     # set the connections in the district
     district.set_connections(connections)
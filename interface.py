@@ -60,6 +60,7 @@ class Interface():
             self.shared = False
 
         if cable_type == 's':
+            district.shared = True
             self.algorithms = self.init_shared_algorithms(district)
             self.shared = True
 
@@ -112,11 +113,19 @@ class Interface():
                 'r': {'name': 'Randomized', \
                     'description': 'Randomly shuffles houses list and assign houses to battery untill valid configuration is found', \
                     'class': algorithms.Randomize(district), \
-                    'optimizations': ['s', 'g']},
+                    'optimizations': ['s', 'sm', 'g', 'a', 'ls', 'sa']},
                 'ro': {'name': 'RandomOptimize', \
                     'description': 'Randomly shuffles houses list and assign house to nearest free battery untill valid configuration is found', \
                     'class': algorithms.RandomOptimize(district), \
-                    'optimizations': ['s', 'g']},
+                    'optimizations': ['s', 'sm', 'g', 'a', 'ls', 'sa']},
+                'ri': {'name': 'RegretInsertion', \
+                    'description': 'Connects the house with the largest cost difference between its cheapest and second cheapest free battery first', \
+                    'class': algorithms.RegretInsertion(district), \
+                    'optimizations': ['s', 'sm', 'g', 'a', 'ls', 'sa']},
+                'rn': {'name': 'RegretInsertion (noise)', \
+                    'description': 'Connects houses in order of regret with random noise on the regrets', \
+                    'class': algorithms.RegretInsertion(district, noise=0.3), \
+                    'optimizations': ['s', 'sm', 'g', 'a', 'ls', 'sa']},
                 'l': {'name': 'Lowerbound', \
                     'description': 'Assign house to nearest battery', \
                     'class': algorithms.LowerBound(district), \
@@ -132,9 +141,25 @@ class Interface():
                     'description': 'Swaps cables with similar output house untill no swaps possible', \
                     'class': algorithms.SimpleSwap(district), \
                     'optimizations': []},
+                'sm': {'name': 'SimpleSwap (matrix)', \
+                    'description': 'Calculates the gains of all swaps at once and applies the best swaps in batches untill no swaps possible', \
+                    'class': algorithms.SimpleSwap(district, matrix=True), \
+                    'optimizations': []},
                 'g': {'name': 'GroupSwap', \
                     'description': 'Swaps longest cables in groups', \
                     'class': algorithms.GroupSwap(district), \
+                    'optimizations': []},
+                'a': {'name': 'ALNS', \
+                    'description': 'Disconnects and reconnects groups of houses with adaptive operators, keeping the cheapest configuration', \
+                    'class': algorithms.ALNS(district), \
+                    'optimizations': []},
+                'ls': {'name': 'LocalSearch', \
+                    'description': 'Shifts, swaps and rotates houses between batteries untill no move lowers the costs', \
+                    'class': algorithms.LocalSearch(district), \
+                    'optimizations': []},
+                'sa': {'name': 'SimulatedAnnealing', \
+                    'description': 'Randomly shifts and swaps houses, accepting worse moves less often as the temperature cools down', \
+                    'class': algorithms.SimulatedAnnealing(district), \
                     'optimizations': []}
             }
         } 
@@ -161,29 +186,45 @@ class Interface():
                 'cc': {'name': 'ConfigFinderCosts', \
                     'description': 'Removes closest neighbours with capacity offset, random shuffles removed houses and connects them to closest free battery', \
                     'class': algorithms.ConfigFinderCosts(district, clusters), \
-                    'optimizations': ['rs', 's']},
+                    'optimizations': ['rs', 's', 'st', 'sa']},
                 'cl': {'name': 'ConfigFinderLength', \
                     'description': 'Removes closest neighbours with capacity offset, random shuffles removed houses and connects them to closest free battery', \
                     'class': algorithms.ConfigFinderLength(district, clusters), \
-                    'optimizations': ['rs', 's']},
+                    'optimizations': ['rs', 's', 'st', 'sa']},
                 'dc': {'name': 'DepthFirstCost', \
                     'description': 'Removes closest neighbours with capacity offset, random shuffles removed houses and builds children with closest neighbour', \
-                    'class': algorithms.DepthFirstCosts(district), \
-                    'optimizations': ['rs', 's']},
+                    'class': algorithms.DepthFirstCosts(district, processes=os.cpu_count()), \
+                    'optimizations': ['rs', 's', 'st', 'sa']},
+                'db': {'name': 'DepthFirstCost (branch and bound)', \
+                    'description': 'Removes closest neighbours with capacity offset and searches all their batteries lowest bound first, cutting branches whose lower bound can not beat the best costs, for at most 60 seconds', \
+                    'class': algorithms.DepthFirstCosts(district, branch_and_bound=True, processes=os.cpu_count(), time_limit=60), \
+                    'optimizations': ['rs', 's', 'st', 'sa']},
+                'bs': {'name': 'BeamSearch', \
+                    'description': 'Removes closest neighbours with capacity offset, finds a greedy first configuration and searches for a cheaper one, keeping only the 1000 configurations with the lowest bound for every house, so the result is not guaranteed optimal', \
+                    'class': algorithms.BeamSearch(district, beam_width=1000), \
+                    'optimizations': ['rs', 's', 'st', 'sa']},
                 'dl': {'name': 'DepthFirstLength', \
                     'description': 'Removes closest neighbours with capacity offset, random shuffles removed houses and builds children with closest neighbour', \
-                    'class': algorithms.DepthFirstLength(district, clusters), \
-                    'optimizations': ['rs', 's']}
+                    'class': algorithms.DepthFirstLength(district, clusters, processes=os.cpu_count()), \
+                    'optimizations': ['rs', 's', 'st', 'sa']}
             },
             'optimization':
             {
                 'rs': {'name': 'RandomSharedGreedy', \
                     'description': 'Make random pathways to nearest connectpoint and save lowest cost configuration', \
-                    'class': algorithms.RandomSharedGreedy(district), \
+                    'class': algorithms.RandomSharedGreedy(district, processes=os.cpu_count()), \
                     'optimizations': []},
                 's': {'name': 'SharedGreedy', \
                     'description': 'Make pathway from house to nearest connectpoint', \
-                    'class': algorithms.SharedGreedy(district), \
+                    'class': algorithms.SharedGreedy(district, processes=os.cpu_count()), \
+                    'optimizations': []},
+                'st': {'name': 'SteinerTree', \
+                    'description': 'Build a rectilinear Steiner tree per battery by adding the grid points that shorten its spanning tree', \
+                    'class': algorithms.SteinerTree(district), \
+                    'optimizations': []},
+                'sa': {'name': 'SharedAnnealing', \
+                    'description': 'Reassigns houses, reroutes cables and flips L-shaped cables, accepting worse moves less often as the temperature cools down', \
+                    'class': algorithms.SharedAnnealing(district), \
                     'optimizations': []}
             }
         } 